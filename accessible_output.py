@@ -1,9 +1,18 @@
 # accessible_output.py
 
-from accessible_output2.outputs.auto import Auto
+import headless
+
+class SilentSpeaker:
+    """Stands in for the screen reader in headless mode."""
+    def speak(self, text, interrupt=True):
+        pass
 
 # Initialize the screen reader output
-speaker = Auto()
+if headless.is_enabled():
+    speaker = SilentSpeaker()
+else:
+    from accessible_output2.outputs.auto import Auto
+    speaker = Auto()
 
 def speak(text, interrupt=True):
     """
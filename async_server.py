@@ -0,0 +1,157 @@
+# async_server.py
+
+import asyncio
+import sys
+import time
+import protocol
+from game_room import GameRoom, RoomChannel
+from question_pack import reload_on_sighup
+from settings import SERVER_PORT
+
+# Pending connections the OS will queue while the loop is busy
+BACKLOG = 512
+# Bytes buffered for a client that has stopped reading before it is dropped
+MAX_WRITE_BUFFER = 1024 * 1024
+
+class AsyncRoomChannel(RoomChannel):
+    """A room's connections, all served from the event loop, so no lock is needed."""
+    def __init__(self, room):
+        super().__init__(room)
+        self.connections = 0
+        # Encoded state reused by every reply until the room changes
+        self.packed_version = -1
+        self.packed = None
+
+    def send(self, writer, data):
+        if writer.is_closing():
+            return
+        if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+            print("Dropping a connection that stopped reading.")
+            self.subscribers.discard(writer)
+            # Its handle_client sees the connection close and cleans up
+            writer.transport.abort()
+            return
+        writer.write(data)
+
+    def call_later(self, seconds, callback):
+        asyncio.get_running_loop().call_later(seconds, callback)
+
+    def packed_state(self):
+        if self.packed_version != self.room.version:
+            self.packed = protocol.pack(self.room.get_state())
+            self.packed_version = self.room.version
+        return self.packed
+
+
+class AsyncGameServer:
+    """
+    Event-driven alternative to the thread-per-connection loop in server.py.
+    Speaks the same handshake and commands as threaded_client, but every
+    connection is a coroutine on one event loop, so rooms need no lock.
+
+    Given a room, every client joins that room (the single-lobby mode used
+    by server.py --async). Without one, the server hosts any number of rooms
+    keyed by the lobby ID each client sends in its handshake; a room is
+    created by the first player to ask for it and dropped once it empties.
+    """
+    def __init__(self, port, room=None, backlog=BACKLOG):
+        self.port = port
+        self.backlog = backlog
+        self.default_channel = AsyncRoomChannel(room) if room else None
+        # Registry of hosted rooms: { lobby_id: RoomChannel }
+        self.channels = {}
+
+    def route(self, player_name, lobby_id, lobby_name):
+        """Finds (or creates) the room a handshake asked for. Returns None to reject."""
+        if self.default_channel:
+            return self.default_channel
+        if not lobby_id:
+            return None
+
+        channel = self.channels.get(lobby_id)
+        if channel is None:
+            # The first player to ask for a lobby becomes its host
+            room = GameRoom(lobby_name or lobby_id, player_name)
+            channel = AsyncRoomChannel(room)
+            self.channels[lobby_id] = channel
+            print(f"Created room '{lobby_id}' for host '{player_name}'. Rooms: {len(self.channels)}")
+        return channel
+
+    def release(self, lobby_id, channel):
+        channel.connections -= 1
+        if channel.connections <= 0 and self.channels.get(lobby_id) is channel:
+            del self.channels[lobby_id]
+            print(f"Closed empty room '{lobby_id}'. Rooms: {len(self.channels)}")
+
+    async def handle_client(self, reader, writer):
+        # --- HANDSHAKE: Receive Name (and Lobby ID) ---
+        try:
+            hello = await protocol.read_message(reader)
+            player_name, lobby_id, lobby_name = protocol.parse_hello(hello)
+        except EOFError:
+            writer.close()
+            return
+        except Exception as e:
+            print(f"Handshake error: {e}")
+            writer.close()
+            return
+
+        channel = self.route(player_name, lobby_id, lobby_name)
+        if channel is None:
+            print(f"Rejected '{player_name}': no lobby ID given.")
+            writer.write(protocol.pack(None))
+            writer.close()
+            return
+        channel.connections += 1
+
+        # --- HANDSHAKE: Assign ID ---
+        player_object = channel.join(player_name)
+        player_id = player_object.id
+        writer.write(protocol.pack(player_object))
+
+        # Main Loop
+        try:
+            while True:
+                command = await protocol.read_message(reader)
+                arrived_ns = time.monotonic_ns()
+                if channel.handle_timed(writer, player_id, command, arrived_ns):
+                    continue
+                channel.handle(writer, player_id, command)
+                await writer.drain()
+        except (protocol.ProtocolError, ConnectionResetError, EOFError):
+            pass
+        except Exception as e:
+            print(f"Error: {e}")
+
+        print(f"Player {player_id} ({player_name}) disconnected.")
+        channel.leave(writer, player_id)
+        if not self.default_channel:
+            self.release(lobby_id, channel)
+        writer.close()
+
+    async def serve(self):
+        try:
+            server = await asyncio.start_server(self.handle_client, host="", port=self.port, backlog=self.backlog)
+        except OSError as e:
+            print(f"Bind Error: {e}")
+            return
+
+        print("Waiting for connections (asyncio)...")
+        async with server:
+            await server.serve_forever()
+
+def run(room, port):
+    try:
+        asyncio.run(AsyncGameServer(port, room).serve())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == '__main__':
+    # Multi-lobby mode: python async_server.py [port]
+    port = SERVER_PORT
+    if len(sys.argv) > 1:
+        try: port = int(sys.argv[1])
+        except ValueError: pass
+    print(f"Multi-lobby server on port {port}")
+    reload_on_sighup('questions.json')
+    run(None, port)
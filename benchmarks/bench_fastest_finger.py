@@ -0,0 +1,79 @@
+# bench_fastest_finger.py
+#
+# Many connections answering a Fastest Finger First question at the same
+# moment: one thread per player, released together by a barrier, each
+# stamping and submitting its answer. Compares handing answers straight to
+# the round (what server.py does) with taking the room's state lock for
+# every answer (how every other command is handled): how long a submit
+# takes, and how late the stamp it is ranked by is taken. Then checks the
+# ranking is in microsecond order.
+# Run from the repository root: python benchmarks/bench_fastest_finger.py [--players 512]
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(ROOT)
+
+from game_room import GameRoom
+
+def run(players, locked):
+    room = GameRoom("Bench", "Host")
+    for i in range(players):
+        room.add_player("Host" if i == 0 else f"Player {i}")
+    room.take_deltas()
+    room.handle_command(0, "fastest_finger")
+    order = room.fastest_finger.question["order"]
+    lock = threading.Lock()
+    barrier = threading.Barrier(players)
+    waits = [0] * players
+    stamp_delays = [0] * players
+    finished = []
+
+    def player(player_id):
+        barrier.wait()
+        arrived_ns = time.monotonic_ns()
+        if locked:
+            with lock:
+                # Stamped once the lock is ours, as a command handled under it would be
+                stamped_ns = time.monotonic_ns()
+                done = room.submit_fastest_finger(player_id, order, stamped_ns)
+        else:
+            stamped_ns = arrived_ns
+            done = room.submit_fastest_finger(player_id, order, stamped_ns)
+        waits[player_id] = time.monotonic_ns() - arrived_ns
+        stamp_delays[player_id] = stamped_ns - arrived_ns
+        if done:
+            finished.append(done)
+
+    threads = [threading.Thread(target=player, args=(i,)) for i in range(players)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    start = time.perf_counter()
+    room.close_fastest_finger(finished[0])
+    rank_ms = (time.perf_counter() - start) * 1000
+    ranking = room.take_deltas()[-1]["fastest_finger_result"]["ranking"]
+    times = [micros for _, _, micros in ranking]
+    assert times == sorted(times) and len(ranking) == players
+
+    waits_us = sorted(w / 1000 for w in waits)
+    label = "room lock" if locked else "lock-free"
+    print(f"{label:<10} {players} answers: submit p50 {statistics.median(waits_us):7.1f} us, "
+          f"max {waits_us[-1]:7.1f} us; stamp late by up to {max(stamp_delays) / 1000:7.1f} us; "
+          f"ranked in {rank_ms:.2f} ms; {len(set(times))} distinct microsecond times")
+
+def main():
+    parser = argparse.ArgumentParser(description="Fastest Finger First submission benchmark")
+    parser.add_argument("--players", type=int, default=512)
+    args = parser.parse_args()
+    for locked in (True, False):
+        run(args.players, locked)
+
+if __name__ == '__main__':
+    main()
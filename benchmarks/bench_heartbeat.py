@@ -0,0 +1,142 @@
+# bench_heartbeat.py
+#
+# Compares the two ways the lobby spy service can ingest heartbeats:
+# JSON over HTTP (POST /lobbies and the ping route) and the compact UDP
+# packets of the optional listener.
+#
+#   1. Handler cost: time spent in the service per heartbeat, in-process,
+#      with no network involved (Flask test client vs the UDP handler).
+#   2. Loopback: the real waitress server and UDP listener, fed by sender
+#      processes so the senders don't compete with the service for the GIL.
+#
+# Run from the repository root: python benchmarks/bench_heartbeat.py
+
+import argparse
+import http.client
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from waitress.server import create_server
+import spy_service
+from heartbeat import pack_udp_heartbeat
+
+def lobby(port):
+    return {"name": f"Lobby {port}", "host": "Host", "port": port, "players": 2, "max_players": 4}
+
+def bench_handlers(count, lobby_count):
+    client = spy_service.app.test_client()
+    headers = {"Content-Type": "application/json"}
+    bodies = [json.dumps(lobby(20000 + i)) for i in range(lobby_count)]
+    fulls = [pack_udp_heartbeat(lobby(20000 + i), True) for i in range(lobby_count)]
+    pings = [pack_udp_heartbeat(lobby(20000 + i), False) for i in range(lobby_count)]
+    addr = ("127.0.0.1", 40000)
+
+    results = {}
+    start = time.perf_counter()
+    for i in range(count):
+        client.post("/lobbies", data=bodies[i % lobby_count], headers=headers)
+    results["HTTP full"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(count):
+        client.post(f"/lobbies/{20000 + i % lobby_count}/ping")
+    results["HTTP ping"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(count):
+        spy_service.handle_udp_heartbeat(fulls[i % lobby_count], addr)
+    results["UDP full"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(count):
+        spy_service.handle_udp_heartbeat(pings[i % lobby_count], addr)
+    results["UDP ping"] = time.perf_counter() - start
+
+    print(f"Handler cost ({count} heartbeats, {lobby_count} lobbies, one core)")
+    for name, elapsed in results.items():
+        print(f"  {name:<10} {elapsed / count * 1e6:8.1f} us/heartbeat  {count / elapsed:10.0f}/s")
+
+def http_sender(host, port, index, count):
+    conn = http.client.HTTPConnection(host, port, timeout=10)
+    body = json.dumps(lobby(30000 + index))
+    for _ in range(count):
+        conn.request("POST", "/lobbies", body, {"Content-Type": "application/json"})
+        conn.getresponse().read()
+    conn.close()
+
+def udp_sender(host, port, index, count):
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    packet = pack_udp_heartbeat(lobby(30000 + index), True)
+    for i in range(count):
+        sock.sendto(packet, (host, port))
+        # Stay roughly within what one listener thread can absorb
+        if i % 256 == 255:
+            time.sleep(0.002)
+    sock.close()
+
+def run_senders(target, args, senders, count):
+    procs = [multiprocessing.Process(target=target, args=(args.host, args.port if target is http_sender else args.udp_port, i, count))
+             for i in range(senders)]
+    start = time.perf_counter()
+    for proc in procs: proc.start()
+    for proc in procs: proc.join()
+    return time.perf_counter() - start
+
+def bench_loopback(args):
+    spy_service.print = lambda *a, **k: None
+    logging.getLogger("waitress.queue").setLevel(logging.ERROR)
+    server = create_server(spy_service.app, host=args.host, port=args.port, threads=args.threads)
+    threading.Thread(target=server.run, daemon=True).start()
+
+    received = [0]
+    handle = spy_service.handle_udp_heartbeat
+    def counting_handler(packet, addr):
+        received[0] += 1
+        return handle(packet, addr)
+    spy_service.handle_udp_heartbeat = counting_handler
+    spy_service.start_udp_listener(args.udp_port, args.host)
+    time.sleep(0.5)
+
+    total = args.senders * args.loopback
+    print(f"Loopback ({args.senders} sender processes, {total} heartbeats each way)")
+
+    elapsed = run_senders(http_sender, args, args.senders, args.loopback)
+    print(f"  HTTP       {total / elapsed:10.0f}/s   all {total} acknowledged")
+
+    elapsed = run_senders(udp_sender, args, args.senders, args.loopback)
+    # Let the listener drain whatever is still in the socket buffer
+    last = -1
+    while received[0] != last:
+        last = received[0]
+        time.sleep(0.2)
+    lost = total - received[0]
+    print(f"  UDP        {received[0] / elapsed:10.0f}/s   {received[0]} ingested, {lost} dropped ({lost / total:.1%})")
+    spy_service.handle_udp_heartbeat = handle
+
+def main():
+    parser = argparse.ArgumentParser(description="Lobby heartbeat ingestion benchmark")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=19451)
+    parser.add_argument("--udp-port", type=int, default=19452)
+    parser.add_argument("--count", type=int, default=20000, help="Heartbeats per handler benchmark")
+    parser.add_argument("--lobbies", type=int, default=1000)
+    parser.add_argument("--senders", type=int, default=4, help="Sender processes for the loopback run")
+    parser.add_argument("--loopback", type=int, default=5000, help="Heartbeats per sender in the loopback run")
+    parser.add_argument("--threads", type=int, default=4, help="waitress worker threads")
+    args = parser.parse_args()
+
+    spy_service.print = lambda *a, **k: None
+    bench_handlers(args.count, args.lobbies)
+    print()
+    bench_loopback(args)
+
+if __name__ == '__main__':
+    main()
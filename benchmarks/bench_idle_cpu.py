@@ -0,0 +1,56 @@
+# bench_idle_cpu.py
+#
+# Leaves the game sitting on the main menu with no input and reports how
+# much CPU the process used, with dirty rectangles and the idle frame rate
+# on (the default) and with both turned off (a full flip at FPS every
+# frame, as before). Uses the SDL dummy drivers, so it runs without a
+# display; the real cost of a full flip is higher on actual hardware.
+# Run from the repository root: python benchmarks/bench_idle_cpu.py [--seconds 300]
+
+import argparse
+import os
+import subprocess
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def measure(mode, seconds):
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+    os.chdir(ROOT)
+    import pygame
+    import main
+
+    if mode == "always-flip":
+        # Never idle, and make every frame a full update
+        main.IDLE_FPS = main.FPS
+        main.Canvas.present = lambda self: (pygame.display.flip(), True)[1]
+
+    game = main.Game()
+    threading.Timer(seconds, lambda: setattr(game, "running", False)).start()
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    game.run()
+    cpu = time.process_time() - cpu_start
+    wall = time.perf_counter() - wall_start
+    print(f"{mode:<12} {wall:6.0f}s wall, {cpu:7.2f}s CPU ({cpu / wall:6.1%} of one core)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Idle menu CPU benchmark")
+    parser.add_argument("--seconds", type=float, default=300, help="How long to sit on the menu")
+    parser.add_argument("mode", nargs="?", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        measure(args.mode, args.seconds)
+        return
+    # Each mode in a fresh process
+    for mode in ("always-flip", "dirty-idle"):
+        subprocess.run([sys.executable, os.path.abspath(__file__), "--seconds", str(args.seconds), mode],
+                       check=True, stderr=subprocess.DEVNULL)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# bench_protocol.py
+#
+# Compares the framed binary protocol against the old raw pickle path.
+# Run from the repository root: python benchmarks/bench_protocol.py
+
+import os
+import pickle
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import protocol
+from player import Player
+
+ITERATIONS = 20000
+
+def make_game_state(player_count, name_length):
+    players = []
+    for i in range(player_count):
+        p = Player(i)
+        p.name = (f"Player {i} " * name_length)[:name_length]
+        players.append(p)
+    return {
+        "players": players,
+        "game_started": False,
+        "lobby_name": "Friday Night Millionaire",
+        "host_name": players[0].name if players else "Host"
+    }
+
+def bench(label, message):
+    pickled = pickle.dumps(message)
+    framed = protocol.pack(message)
+    payload = framed[protocol.HEADER.size:]
+
+    pickle_enc = timeit.timeit(lambda: pickle.dumps(message), number=ITERATIONS)
+    pickle_dec = timeit.timeit(lambda: pickle.loads(pickled), number=ITERATIONS)
+    codec_enc = timeit.timeit(lambda: protocol.pack(message), number=ITERATIONS)
+    codec_dec = timeit.timeit(lambda: protocol.decode(payload), number=ITERATIONS)
+
+    def us(total): return total / ITERATIONS * 1e6
+
+    print(f"{label:<28} {len(pickled):>8} {len(framed):>8}"
+          f" {us(pickle_enc):>9.2f} {us(codec_enc):>9.2f}"
+          f" {us(pickle_dec):>9.2f} {us(codec_dec):>9.2f}")
+
+def main():
+    print(f"{'message':<28} {'pickle B':>8} {'framed B':>8}"
+          f" {'pkl enc':>9} {'enc us':>9} {'pkl dec':>9} {'dec us':>9}")
+    bench("command 'get'", "get")
+    bench("handshake name", "Player 1")
+    bench("assigned Player", make_game_state(1, 8)["players"][0])
+    bench("game_state 4 x 16 chars", make_game_state(4, 16))
+    bench("game_state 4 x 200 chars", make_game_state(4, 200))
+    bench("game_state 64 x 32 chars", make_game_state(64, 32))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+# bench_question_store.py
+#
+# Generates a synthetic question bank (1,000,000 questions by default) and
+# compares loading it the old way (json.load of the whole file) with the
+# indexed QuestionStore: building the index on first open, reopening with
+# the saved index, and drawing a 15-question game; then converts it to a
+# question pack and opens that, reading every field of the game's
+# questions. Each case runs in a fresh process so its memory can be
+# measured on its own: what stays resident afterwards, and the peak
+# (VmHWM) reached while loading.
+# Run from the repository root: python benchmarks/bench_question_store.py [--questions N]
+
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def rss_mb(field="VmRSS"):
+    """Resident memory of this process in megabytes (Linux), or 0 if unknown.
+    RssAnon leaves out mapped file pages, which are shared with the OS file cache;
+    VmHWM is the most that has ever been resident."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def generate(path, count):
+    rng = random.Random(1)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("[\n")
+        for i in range(count):
+            question = {
+                "question": f"Synthetic question number {i} about topic {rng.randrange(5000)}?",
+                "answers": [f"Answer {rng.randrange(100000)}" for _ in range(4)],
+                "correct_answer": "ABCD"[rng.randrange(4)],
+                "tier": i % 15 + 1
+            }
+            f.write(("," if i else "") + json.dumps(question) + "\n")
+        f.write("]\n")
+
+def measure(mode, path):
+    from question_store import QuestionStore
+    from question_pack import QuestionPack
+    base = rss_mb()
+    base_private = rss_mb("RssAnon")
+    start = time.perf_counter()
+    if mode == "json.load":
+        with open(path, 'r') as f:
+            questions = json.load(f)
+        game = questions[:15]
+    else:
+        store = QuestionPack(path) if mode == "pack" else QuestionStore.open(path)
+        draw_start = time.perf_counter()
+        game = [dict(store.get(qid)) for qid in store.draw_game()]
+        draw_ms = (time.perf_counter() - draw_start) * 1000
+    elapsed = time.perf_counter() - start
+    extra = f", of which drawing the game {draw_ms:.2f} ms" if mode != "json.load" else ""
+    print(f"{mode:<14} {elapsed:7.2f}s, +{rss_mb() - base:7.1f} MB resident "
+          f"(+{rss_mb('RssAnon') - base_private:7.1f} MB private), "
+          f"+{rss_mb('VmHWM') - base:7.1f} MB peak{extra}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Question bank load benchmark")
+    parser.add_argument("--questions", type=int, default=1000000)
+    parser.add_argument("mode", nargs="?", help=argparse.SUPPRESS)
+    parser.add_argument("path", nargs="?", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        measure(args.mode, args.path)
+        return
+
+    with tempfile.TemporaryDirectory() as temp:
+        path = os.path.join(temp, "questions.json")
+        start = time.perf_counter()
+        generate(path, args.questions)
+        print(f"Generated {args.questions} questions ({os.path.getsize(path) / 1048576:.0f} MB) "
+              f"in {time.perf_counter() - start:.1f}s")
+        # The first store open builds and saves the index; the second reuses it
+        for mode in ("json.load", "index build", "index reuse"):
+            subprocess.run([sys.executable, os.path.abspath(__file__), mode, path], check=True)
+
+        from question_pack import convert
+        pack_path = os.path.join(temp, "questions.qpack")
+        start = time.perf_counter()
+        convert(path, pack_path)
+        print(f"Converted in {time.perf_counter() - start:.1f}s")
+        subprocess.run([sys.executable, os.path.abspath(__file__), "pack", pack_path], check=True)
+
+if __name__ == '__main__':
+    main()
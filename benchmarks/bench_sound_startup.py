@@ -0,0 +1,72 @@
+# bench_sound_startup.py
+#
+# Measures how long SoundManager takes to start and how much memory it
+# holds afterwards, against decoding every sound up front the way it used
+# to. The "all" mode loads every sting through SoundManager, which reads
+# from sounds/sounds.pack when it has been built (python sound_pack.py).
+# Each mode runs in a fresh process so one doesn't warm the other.
+# Run from the repository root: python benchmarks/bench_sound_startup.py
+
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+def rss_mb():
+    """Resident memory of this process in megabytes (Linux), or 0 if unknown."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+def measure(mode):
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    os.chdir(ROOT)
+    import pygame
+    from settings import SOUND_FILES
+    from sound_manager import SoundManager
+
+    pygame.mixer.init(44100, -16, 2, 2048)
+    base = rss_mb()
+    start = time.perf_counter()
+    if mode == "eager":
+        # What SoundManager.load_sounds did before: decode every entry
+        sounds = {}
+        for key, filename in SOUND_FILES.items():
+            path = os.path.join("sounds", filename)
+            if os.path.exists(path):
+                sounds[key] = pygame.mixer.Sound(path)
+    else:
+        manager = SoundManager()
+        if mode == "all":
+            manager.cache.budget = 1 << 40
+            for key in SOUND_FILES:
+                manager.get_sound(key)
+    elapsed = time.perf_counter() - start
+    resident = rss_mb() - base
+
+    first_play = ""
+    if mode == "lazy":
+        start = time.perf_counter()
+        manager.play("win_5")
+        first_play = f", first sting play {(time.perf_counter() - start) * 1000:.1f} ms"
+    if mode == "all":
+        mode += " (pack)" if manager.pack else " (files)"
+    print(f"{mode:<11} startup {elapsed * 1000:8.1f} ms, +{resident:7.1f} MB resident{first_play}")
+
+def main():
+    if len(sys.argv) > 1:
+        measure(sys.argv[1])
+        return
+    for mode in ("eager", "lazy", "all"):
+        subprocess.run([sys.executable, os.path.abspath(__file__), mode], check=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+# load_client.py
+#
+# Opens N simulated clients against a running game server and reports reply
+# latency percentiles. Start a server first, e.g.
+#     python server.py 50550 "Load Test" Host 0 --async
+# then run from the repository root:
+#     python benchmarks/load_client.py --clients 300 --requests 200
+# For the multi-lobby server (python async_server.py 50550), spread the
+# clients over rooms with --rooms.
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import protocol
+
+def percentile(sorted_values, fraction):
+    if not sorted_values: return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def simulated_client(index, args, latencies, failures):
+    try:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(args.host, args.port), args.timeout)
+    except (OSError, asyncio.TimeoutError) as e:
+        failures.append(f"connect: {e}")
+        return
+
+    try:
+        lobby_id = f"room-{index % args.rooms}" if args.rooms else None
+        writer.write(protocol.pack(protocol.make_hello(f"Bot {index}", lobby_id)))
+        await asyncio.wait_for(protocol.read_message(reader), args.timeout)
+
+        for _ in range(args.requests):
+            start = time.perf_counter()
+            writer.write(protocol.pack("get"))
+            await writer.drain()
+            await asyncio.wait_for(protocol.read_message(reader), args.timeout)
+            latencies.append(time.perf_counter() - start)
+            if args.interval:
+                await asyncio.sleep(args.interval)
+    except asyncio.TimeoutError:
+        failures.append(f"client {index}: timed out after {args.timeout}s")
+    except (OSError, EOFError, protocol.ProtocolError) as e:
+        failures.append(f"client {index}: {e}")
+    finally:
+        writer.close()
+
+async def run(args):
+    latencies = []
+    failures = []
+    started = time.perf_counter()
+    await asyncio.gather(*(simulated_client(i, args, latencies, failures) for i in range(args.clients)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"Clients:    {args.clients} ({len(failures)} failed)")
+    print(f"Replies:    {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s)")
+    print(f"p50:        {percentile(latencies, 0.50) * 1000:.2f} ms")
+    print(f"p99:        {percentile(latencies, 0.99) * 1000:.2f} ms")
+    print(f"max:        {percentile(latencies, 1.0) * 1000:.2f} ms")
+    for failure in failures[:10]:
+        print(f"  {failure}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Game server load generator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=50550)
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=100, help="'get' commands per client")
+    parser.add_argument("--rooms", type=int, default=0, help="Spread clients over this many lobby IDs")
+    parser.add_argument("--timeout", type=float, default=10.0, help="Seconds to wait for any single reply")
+    parser.add_argument("--interval", type=float, default=0.0, help="Seconds between requests per client")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == '__main__':
+    main()
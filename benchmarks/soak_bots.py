@@ -0,0 +1,112 @@
+# soak_bots.py
+#
+# Soak test for the real client: starts server.py, then runs many headless
+# copies of main.py (python main.py --headless --script ...) that join the
+# lobby, time repeated lobby resyncs, play a game with scripted key presses
+# and quit. Prints each bot's frame and round-trip statistics and a summary.
+# Run from the repository root:
+#     python benchmarks/soak_bots.py --bots 32 [--async]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def bot_script(args, index):
+    name = f"Bot {index}"
+    steps = [
+        {"connect": {"host": "127.0.0.1", "port": args.port, "name": name}},
+        {"until": "lobby", "timeout": args.timeout},
+        {"repeat": args.resyncs, "steps": [{"resync": True}, {"wait": args.resync_interval}]}
+    ]
+    if index == 0:
+        # The host starts the game once everyone has had time to join
+        steps += [{"wait": 2}, {"key": "return"}]
+    steps += [
+        {"until": "gameplay", "timeout": args.timeout},
+        # Select and lock in A (one press is enough below 2,000), then reveal
+        {"repeat": args.answers, "steps": [
+            {"key": "a"}, {"wait": 0.3}, {"key": "a"}, {"wait": 0.3}, {"key": "return"}, {"wait": 1}
+        ]},
+        {"until": "menu", "timeout": args.timeout},
+        {"quit": True}
+    ]
+    return steps
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless client soak test")
+    parser.add_argument("--bots", type=int, default=32)
+    parser.add_argument("--port", type=int, default=50590)
+    parser.add_argument("--async", dest="use_async", action="store_true", help="Run server.py --async")
+    parser.add_argument("--resyncs", type=int, default=20, help="Timed lobby resyncs per bot")
+    parser.add_argument("--resync-interval", type=float, default=0.25)
+    parser.add_argument("--answers", type=int, default=20, help="Answer attempts before waiting for game over")
+    parser.add_argument("--timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    # A "probe" connection would join the lobby; just give the server time to bind
+    command = [sys.executable, "server.py", str(args.port), "Soak Lobby", "Bot 0", "0"]
+    if args.use_async: command.append("--async")
+    server = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(1.5)
+
+    bots = []
+    results = []
+    with tempfile.TemporaryDirectory() as temp:
+        try:
+            started = time.perf_counter()
+            for index in range(args.bots):
+                path = os.path.join(temp, f"bot{index}.json")
+                with open(path, 'w') as f:
+                    json.dump(bot_script(args, index), f)
+                bots.append(subprocess.Popen([sys.executable, "main.py", "--headless", "--script", path],
+                                             cwd=ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True))
+
+            for index, bot in enumerate(bots):
+                try:
+                    output, _ = bot.communicate(timeout=args.timeout * 3)
+                except subprocess.TimeoutExpired:
+                    bot.kill()
+                    output, _ = bot.communicate()
+                stats = None
+                for line in output.splitlines():
+                    if line.startswith("BOT_STATS "):
+                        stats = json.loads(line[len("BOT_STATS "):])
+                results.append((index, stats))
+            elapsed = time.perf_counter() - started
+        finally:
+            for bot in bots:
+                if bot.poll() is None: bot.kill()
+            server.terminate()
+            server.wait()
+
+    print(f"{'bot':>4} {'frames':>7} {'avg ms':>7} {'p99 ms':>7} {'max ms':>7} {'rtts':>5} {'rtt p50':>8} {'rtt p99':>8}  result")
+    failures = 0
+    for index, stats in results:
+        if stats is None:
+            failures += 1
+            print(f"{index:>4} no statistics (crashed or killed)")
+            continue
+        ok = stats["script_failed"] is None and stats["round_trips"] > 0
+        failures += not ok
+        print(f"{index:>4} {stats['frames']:>7} {stats['frame_avg_ms']:>7.2f} {stats['frame_p99_ms']:>7.2f} "
+              f"{stats['frame_max_ms']:>7.1f} {stats['round_trips']:>5} {stats['rtt_p50_ms']:>8.1f} "
+              f"{stats['rtt_p99_ms']:>8.1f}  {'ok' if ok else stats['script_failed'] or 'no round trips'}")
+
+    done = [stats for _, stats in results if stats]
+    if done:
+        print(f"\n{len(done)} of {args.bots} bots reported in {elapsed:.1f}s; {failures} failed.")
+        print(f"Worst frame p99 {max(s['frame_p99_ms'] for s in done):.2f} ms, "
+              f"worst frame {max(s['frame_max_ms'] for s in done):.1f} ms.")
+        print(f"Median bot rtt p50 {sorted(s['rtt_p50_ms'] for s in done)[len(done) // 2]:.1f} ms, "
+              f"worst rtt p99 {max(s['rtt_p99_ms'] for s in done):.1f} ms "
+              "(as seen by the game loop, so rounded up to whole frames).")
+    sys.exit(1 if failures else 0)
+
+if __name__ == '__main__':
+    main()
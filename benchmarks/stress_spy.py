@@ -0,0 +1,83 @@
+# stress_spy.py
+#
+# Starts the lobby spy service on a local port and hammers it with
+# concurrent heartbeats (POST) and list requests (GET), then checks that
+# every request succeeded and the registry ended up with the right lobbies.
+# Run from the repository root: python benchmarks/stress_spy.py
+
+import argparse
+import http.client
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from waitress.server import create_server
+import spy_service
+
+def worker(args, index, results):
+    conn = http.client.HTTPConnection(args.host, args.port, timeout=10)
+    for i in range(args.requests):
+        try:
+            if i % 2 == 0:
+                # Each worker owns a few lobbies so heartbeats hit every shard
+                port = 20000 + index * 8 + (i // 2) % 8
+                body = json.dumps({"name": f"Lobby {port}", "host": f"Host {index}",
+                                   "port": port, "players": i % 5, "max_players": 4})
+                conn.request("POST", "/lobbies", body, {"Content-Type": "application/json"})
+            else:
+                conn.request("GET", "/lobbies")
+            response = conn.getresponse()
+            response.read()
+            results.append(response.status)
+        except Exception as e:
+            results.append(f"{type(e).__name__}: {e}")
+            conn.close()
+            conn = http.client.HTTPConnection(args.host, args.port, timeout=10)
+    conn.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Lobby spy stress test")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=19450)
+    parser.add_argument("--workers", type=int, default=64, help="Concurrent client threads")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per worker")
+    parser.add_argument("--threads", type=int, default=8, help="waitress worker threads")
+    args = parser.parse_args()
+
+    # Keep the per-heartbeat logging out of the results
+    spy_service.print = lambda *a, **k: None
+    logging.getLogger("waitress.queue").setLevel(logging.ERROR)
+    server = create_server(spy_service.app, host=args.host, port=args.port, threads=args.threads)
+    threading.Thread(target=server.run, daemon=True).start()
+    time.sleep(0.5)
+
+    results = []
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for index in range(args.workers):
+            pool.submit(worker, args, index, results)
+    elapsed = time.perf_counter() - started
+
+    ok = sum(1 for r in results if r == 200)
+    errors = [r for r in results if r != 200]
+    expected_lobbies = args.workers * min(8, (args.requests + 1) // 2)
+
+    print(f"Requests:   {len(results)} in {elapsed:.2f}s ({len(results) / elapsed:.0f}/s)")
+    print(f"Succeeded:  {ok}")
+    print(f"Failed:     {len(errors)}")
+    for error in errors[:10]:
+        print(f"  {error}")
+    print(f"Lobbies:    {len(spy_service.lobbies)} (expected {expected_lobbies})")
+
+    # The server thread is a daemon and exits with the process
+    if errors or len(spy_service.lobbies) != expected_lobbies:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+# canvas.py
+
+import pygame
+
+class Canvas:
+    """
+    Stands in for the display surface while the screens draw. Drawing goes
+    straight through, but each call is also recorded, so present() can
+    send only the parts of the frame that changed to the display, or skip
+    the update entirely when the frame is identical to the last one.
+
+    Text comes from the shared TextCache, so unchanged text is the very
+    same surface object from frame to frame and compares equal cheaply.
+    """
+    def __init__(self, surface):
+        self.surface = surface
+        self.items = []
+        self.last_items = None  # None forces a full update
+
+    def set_surface(self, surface):
+        """Called after pygame.display.set_mode replaces the display surface."""
+        self.surface = surface
+        self.invalidate()
+
+    def invalidate(self):
+        self.last_items = None
+
+    def begin(self, bg_color):
+        self.items = [("fill", tuple(bg_color))]
+        self.surface.fill(bg_color)
+
+    def blit(self, source, dest):
+        rect = self.surface.blit(source, dest)
+        # Holding the surface keeps it alive, so identity can't be reused
+        self.items.append((source, rect))
+        return rect
+
+    def draw_rect(self, color, rect):
+        rect = pygame.draw.rect(self.surface, color, rect)
+        self.items.append(("rect", tuple(color), rect))
+        return rect
+
+    def draw_line(self, color, start, end, width=1):
+        rect = pygame.draw.line(self.surface, color, start, end, width)
+        self.items.append(("line", tuple(color), rect))
+        return rect
+
+    def present(self):
+        """Updates the display with this frame. Returns False if nothing changed."""
+        last, self.last_items = self.last_items, self.items
+        if last is None or last[0] != self.items[0]:
+            pygame.display.flip()
+            return True
+        if last == self.items:
+            return False
+
+        # Clear where removed items were, draw where new ones are
+        rects = [item[-1] for item in last if item not in self.items]
+        rects += [item[-1] for item in self.items if item not in last]
+        pygame.display.update(rects)
+        return True
@@ -4,6 +4,7 @@ import json
 import os
 import pygame
 from settings import *
+from text_cache import TextCache
 
 CONFIG_FILE = "config.json"
 
@@ -20,6 +21,8 @@ class Config:
             "currency": "GBP" # Default to Pounds
         }
         self.fonts = {}
+        # Rendered text, shared by every screen
+        self.text_cache = TextCache()
         self.load()
         self.update_colors()
         self.update_fonts()
@@ -41,6 +44,7 @@ class Config:
             print(f"Could not save config: {e}")
 
     def update_colors(self):
+        self.text_cache.clear()
         if self.data["theme"] == "High Contrast":
             self.colors = {
                 "bg": HC_BG,
@@ -59,6 +63,7 @@ class Config:
             }
 
     def update_fonts(self):
+        self.text_cache.clear()
         scale_map = {"Normal": 1.0, "Large": 1.25, "Extra Large": 1.5}
         multiplier = scale_map.get(self.data["font_scale"], 1.0)
         def scale(size): return int(size * multiplier)
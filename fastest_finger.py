@@ -0,0 +1,105 @@
+# fastest_finger.py
+#
+# Fastest Finger First: every player in a room puts four answers in order,
+# and the fastest correct order wins. Played on the server, which times
+# each submission itself (see FastestFingerRound).
+
+import bisect
+import json
+import random
+import time
+from collections import deque
+from game_session import OPTIONS
+
+FASTEST_FINGER_FILE = "fastest_finger.json"
+# How long after the deadline servers wait for answers still in flight
+GRACE_SECONDS = 1.0
+# A connection's round trip is the fastest of its last few pings, and never
+# more than this: a client that holds its pongs back gains no more than that
+ROUND_TRIP_SAMPLES = 8
+MAX_ROUND_TRIP_SECONDS = 0.3
+
+def load_questions(path=FASTEST_FINGER_FILE):
+    """
+    Reads the ordering questions: a JSON list of {"question", "answers"
+    (four strings), "order" (the letters A to D in the correct order)}.
+    Raises OSError or ValueError if the file is missing or malformed.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        questions = json.load(f)
+    if not isinstance(questions, list) or not questions:
+        raise ValueError(f"{path} must be a non-empty list")
+    for i, q in enumerate(questions):
+        if (not isinstance(q, dict) or not isinstance(q.get("question"), str)
+                or not isinstance(q.get("answers"), list) or len(q["answers"]) != 4
+                or not isinstance(q.get("order"), str) or sorted(q["order"]) != list(OPTIONS)):
+            raise ValueError(f"Fastest finger question {i} is malformed")
+    return questions
+
+
+class FastestFingerRound:
+    """
+    One Fastest Finger First question. Servers stamp each submission with
+    time.monotonic_ns() as soon as it has been read off the connection,
+    before touching any shared lock, and hand it to submit(). Submissions
+    go onto a deque (appends are atomic), so many connections answering at
+    once never wait on each other; only close() sorts them out.
+
+    A player's time is measured from when the question was sent, less
+    their connection's round trip: the question reached them half a round
+    trip after it was sent, and their answer took the other half to come
+    back.
+    """
+    def __init__(self, question, player_ids, started_ns, seconds):
+        self.question = question
+        self.player_ids = set(player_ids)
+        self.seconds = seconds
+        self.started_ns = started_ns
+        self.deadline_ns = started_ns + int(seconds * 1e9)
+        self.submissions = deque()  # (arrived_ns, sequence, player_id, order, rtt_ns)
+        # Each player only ever submits from their own connection's thread
+        self.answered = set()
+        self.sequence = 0
+        self.closed = False
+
+    def question_state(self):
+        return {"text": self.question["question"], "answers": list(self.question["answers"]), "seconds": self.seconds}
+
+    def submit(self, player_id, order, arrived_ns, rtt_ns=0):
+        """Records a submission. Safe to call from any thread without a lock."""
+        if self.closed or player_id not in self.player_ids or player_id in self.answered:
+            return
+        self.answered.add(player_id)
+        # The sequence number only breaks exact ties, so a racy increment is harmless
+        self.sequence += 1
+        self.submissions.append((arrived_ns, self.sequence, player_id, order, rtt_ns))
+
+    def everyone_answered(self):
+        return len(self.answered) >= len(self.player_ids)
+
+    def close(self):
+        """
+        Ends the round and ranks it: correct orders first, fastest first,
+        then everyone else by time. Answers that arrived after the deadline
+        don't count. Call once, with the room's lock held.
+        """
+        self.closed = True
+        # A submit() that got past the closed check may still be appending, so
+        # rank a copy (taken in one step under the GIL) rather than the deque
+        submissions = list(self.submissions)
+        correct_order = self.question["order"]
+        ranking = []  # kept sorted: (wrong, elapsed_ns, sequence, player_id)
+        for arrived_ns, sequence, player_id, order, rtt_ns in submissions:
+            elapsed_ns = max(0, arrived_ns - self.started_ns - rtt_ns)
+            if self.started_ns + elapsed_ns > self.deadline_ns:
+                continue
+            bisect.insort(ranking, (order != correct_order, elapsed_ns, sequence, player_id))
+
+        results = [[player_id, not wrong, elapsed_ns // 1000] for wrong, elapsed_ns, _, player_id in ranking]
+        winner = results[0][0] if results and results[0][1] else None
+        return {"order": correct_order, "ranking": results, "winner": winner}
+
+
+def start_round(questions, player_ids, seconds, rng=random):
+    """Picks a question and starts the clock on it."""
+    return FastestFingerRound(rng.choice(questions), player_ids, time.monotonic_ns(), seconds)
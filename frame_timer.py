@@ -0,0 +1,45 @@
+# frame_timer.py
+
+import time
+from collections import deque
+
+class FrameTimer:
+    """
+    Records how long each frame spends doing work (events, update and draw,
+    but not the sleep in clock.tick), how much of that work was spent
+    inside Network calls, and how much rendering text. Used to confirm the
+    main loop never blocks on I/O.
+    """
+    def __init__(self, window=600):
+        self.frame_times = deque(maxlen=window)
+        self.network_times = deque(maxlen=window)
+        self.text_times = deque(maxlen=window)
+        self.frame_start = 0.0
+        self.network = None
+        self.network_start = 0.0
+
+    def start(self, network):
+        self.frame_start = time.perf_counter()
+        self.network = network
+        self.network_start = network.main_thread_time if network else 0.0
+
+    def stop(self, network, text_time=0.0):
+        self.frame_times.append(time.perf_counter() - self.frame_start)
+        self.text_times.append(text_time)
+        # Only count network time if the connection didn't change mid-frame
+        if network and network is self.network:
+            self.network_times.append(network.main_thread_time - self.network_start)
+        else:
+            self.network_times.append(0.0)
+
+    def summary(self):
+        if not self.frame_times:
+            return "No frames recorded yet."
+        frames = len(self.frame_times)
+        avg_ms = sum(self.frame_times) / frames * 1000
+        worst_ms = max(self.frame_times) * 1000
+        net_worst_ms = max(self.network_times) * 1000
+        text_avg_ms = sum(self.text_times) / frames * 1000
+        return (f"Last {frames} frames: average work {avg_ms:.1f} milliseconds, "
+                f"worst {worst_ms:.1f}. Worst time in network calls {net_worst_ms:.2f} milliseconds. "
+                f"Average text rendering {text_avg_ms:.2f} milliseconds.")
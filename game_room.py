@@ -0,0 +1,314 @@
+# game_room.py
+
+import contextlib
+import time
+from collections import deque
+from functools import partial
+import protocol
+from player import Player
+from game_session import GameSession
+from question_pack import shared_bank
+import fastest_finger
+from settings import ANSWER_SECONDS, FASTEST_FINGER_SECONDS
+
+class GameRoom:
+    """
+    Holds the state of a single lobby and applies player commands to it.
+    The room does no locking of its own: the threaded server wraps every call
+    in its state lock, while the asyncio server only touches it from the
+    event loop thread.
+    """
+    def __init__(self, lobby_name, host_name):
+        self.lobby_name = lobby_name
+        self.host_name = host_name
+        self.players = []
+        self.game_started = False
+        # The game being played (or last played), decided here rather than on each client
+        self.session = None
+        # The Fastest Finger First round being answered, if any, and its questions once loaded
+        self.fastest_finger = None
+        self.fastest_finger_questions = None
+        self.id_counter = 1
+        # Bumped on every change so servers can tell when cached state is stale
+        self.version = 0
+        # Deltas produced since the server last called take_deltas()
+        self.pending_deltas = []
+        # (seconds, callback) pairs the server should run later, see RoomChannel
+        self.pending_timers = []
+
+    def record_change(self, **changes):
+        """Bumps the version and queues a delta describing what changed."""
+        self.version += 1
+        delta = {"type": "delta", "version": self.version}
+        delta.update(changes)
+        self.pending_deltas.append(delta)
+
+    def record_changes(self, changes):
+        for change in changes:
+            self.record_change(**change)
+
+    def take_deltas(self):
+        deltas = self.pending_deltas
+        self.pending_deltas = []
+        return deltas
+
+    def take_timers(self):
+        timers = self.pending_timers
+        self.pending_timers = []
+        return timers
+
+    def add_player(self, player_name):
+        """Assigns an ID to a newly connected player and returns their Player object."""
+        ghost_ids = []
+        if player_name == self.host_name:
+            print(f"Host '{player_name}' identified. Assigning ID 0.")
+            player_id = 0
+            # Remove any ghost hosts
+            ghost_ids = [p.id for p in self.players if p.id == 0]
+            self.players = [p for p in self.players if p.id != 0]
+        else:
+            player_id = self.id_counter
+            self.id_counter += 1
+            print(f"Player '{player_name}' connected. Assigned ID {player_id}.")
+
+        player = Player(player_id)
+        player.name = player_name
+        self.players.append(player)
+        if ghost_ids:
+            self.record_change(added=[player], removed=ghost_ids)
+        else:
+            self.record_change(added=[player])
+        return player
+
+    def remove_player(self, player_id):
+        self.players = [p for p in self.players if p.id != player_id]
+        changes = {"removed": [player_id]}
+        if player_id == 0:
+            print("Host disconnected. Resetting state.")
+            self.game_started = False
+            changes["game_started"] = False
+        self.record_change(**changes)
+        if self.session and self.game_started:
+            self.record_game_changes(self.session.remove_player(player_id))
+
+    def record_game_changes(self, changes):
+        # The room is open for another game once this one is over
+        if changes and "game_over" in changes[-1]:
+            self.game_started = False
+            changes[-1]["game_started"] = False
+        self.record_changes(changes)
+        for change in changes:
+            if "question" in change:
+                # Nobody can hold the game up by never locking in
+                self.pending_timers.append((ANSWER_SECONDS, partial(
+                    self.answer_time_up, self.session, change["question"]["n"])))
+
+    def answer_time_up(self, session, index):
+        if session is self.session and self.game_started:
+            self.record_game_changes(session.time_up(index))
+
+    def start_game(self):
+        """Deals a new game to everyone in the room. Returns an error reply for the host if it can't."""
+        try:
+            session = GameSession(shared_bank('questions.json').current(), [p.id for p in self.players])
+            first = session.start()
+        except (OSError, ValueError) as e:
+            print(f"Could not start the game: {e}")
+            return {"type": "error", "text": "The server could not load its questions."}
+        self.session = session
+        self.game_started = True
+        self.record_change(game_started=True)
+        self.record_game_changes(first)
+        return None
+
+    def start_fastest_finger(self):
+        """
+        Sends everyone a Fastest Finger First question, and sets a timer to
+        close it once its time (and the grace for answers in flight) is up.
+        """
+        try:
+            if self.fastest_finger_questions is None:
+                self.fastest_finger_questions = fastest_finger.load_questions()
+        except (OSError, ValueError) as e:
+            print(f"Could not start Fastest Finger First: {e}")
+            return {"type": "error", "text": "The server could not load its Fastest Finger questions."}
+        self.fastest_finger = fastest_finger.start_round(
+            self.fastest_finger_questions, [p.id for p in self.players], FASTEST_FINGER_SECONDS)
+        self.record_change(fastest_finger=self.fastest_finger.question_state())
+        self.pending_timers.append((self.fastest_finger.seconds + fastest_finger.GRACE_SECONDS,
+                                    partial(self.close_fastest_finger, self.fastest_finger)))
+        return None
+
+    def submit_fastest_finger(self, player_id, order, arrived_ns, rtt_ns=0):
+        """
+        Records a Fastest Finger answer. Unlike every other method, this one
+        is called without the server's lock. Returns the round once everyone
+        has answered, so the server can close it early, or None.
+        """
+        current = self.fastest_finger
+        if current is None or not isinstance(order, str):
+            return None
+        current.submit(player_id, order, arrived_ns, rtt_ns)
+        return current if current.everyone_answered() else None
+
+    def close_fastest_finger(self, current):
+        """Ranks the round and announces the result, unless it was closed already."""
+        if current is not self.fastest_finger or current.closed:
+            return
+        self.fastest_finger = None
+        self.record_change(fastest_finger_result=current.close())
+
+    def handle_command(self, player_id, command):
+        """Applies a player's command. Returns a reply meant only for that player, or None."""
+        if command == "start" and player_id == 0 and not self.game_started and not self.fastest_finger:
+            return self.start_game()
+        if command == "fastest_finger" and player_id == 0 and not self.game_started and not self.fastest_finger:
+            return self.start_fastest_finger()
+        if isinstance(command, dict) and self.session and self.game_started:
+            changes, reply = self.session.handle(player_id, command)
+            self.record_game_changes(changes)
+            return reply
+        return None
+
+    def get_state(self):
+        return {
+            "players": self.players,
+            "game_started": self.game_started,
+            "game": self.session.get_state() if self.session and self.game_started else None,
+            "lobby_name": self.lobby_name,
+            "host_name": self.host_name
+        }
+
+    def get_snapshot(self):
+        """Full state tagged with its version, sent when a client subscribes."""
+        return {"type": "snapshot", "version": self.version, "state": self.get_state()}
+
+
+class RoomChannel:
+    """
+    A GameRoom together with the connections watching it: the command
+    handling both servers share. Subclasses say how to send to a connection
+    and how to run a callback later; a connection is whatever object they
+    send with (a socket, a StreamWriter).
+
+    Given the lock the server guards the room with, methods documented as
+    "lock held" expect the caller to hold it, and the rest take it
+    themselves. A server that only touches rooms from one thread needs none.
+    """
+    def __init__(self, room, lock=None):
+        self.room = room
+        self.lock = lock or contextlib.nullcontext()
+        # Connections that asked for pushed deltas instead of polling with "get"
+        self.subscribers = set()
+        # The ping each connection has yet to answer: { conn: timestamp sent }
+        self.pings = {}
+        # Recent round trips to each connection in nanoseconds, from its pongs
+        self.round_trips = {}
+
+    def send(self, conn, data):
+        raise NotImplementedError
+
+    def call_later(self, seconds, callback):
+        raise NotImplementedError
+
+    def packed_state(self):
+        return protocol.pack(self.room.get_state())
+
+    def broadcast(self, data):
+        for conn in list(self.subscribers):
+            self.send(conn, data)
+
+    def broadcast_changes(self):
+        """Pushes pending deltas to every subscriber and starts the timers they set. Lock held."""
+        for delta in self.room.take_deltas():
+            self.broadcast(protocol.pack(delta))
+            if "fastest_finger" in delta:
+                # Fresh round trips for the round that just started
+                self.ping()
+        for seconds, callback in self.room.take_timers():
+            self.call_later(seconds, partial(self.run_timer, callback))
+
+    def run_timer(self, callback):
+        with self.lock:
+            callback()
+            self.broadcast_changes()
+
+    def ping(self, conns=None):
+        """Asks every subscriber (or just conns) to echo a timestamp, to measure its round trip. Lock held."""
+        sent_ns = time.monotonic_ns()
+        data = protocol.pack({"type": "ping", "t": sent_ns})
+        for conn in list(self.subscribers if conns is None else conns):
+            # Replaces any ping still unanswered; its pong will be ignored
+            self.pings[conn] = sent_ns
+            self.send(conn, data)
+
+    def pong(self, conn, sent_ns, arrived_ns):
+        """Records a round trip, if sent_ns is exactly the ping this connection is waiting on."""
+        if sent_ns is None or self.pings.get(conn) != sent_ns:
+            return
+        self.pings.pop(conn, None)
+        samples = self.round_trips.get(conn)
+        if samples is None:
+            samples = self.round_trips[conn] = deque(maxlen=fastest_finger.ROUND_TRIP_SAMPLES)
+        samples.append(arrived_ns - sent_ns)
+
+    def round_trip(self, conn):
+        """The round trip used to compensate this connection's answers, in nanoseconds."""
+        samples = self.round_trips.get(conn)
+        if not samples:
+            return 0
+        return min(min(samples), int(fastest_finger.MAX_ROUND_TRIP_SECONDS * 1e9))
+
+    def join(self, player_name):
+        """Adds a newly connected player and returns their Player object. Lock held."""
+        player = self.room.add_player(player_name)
+        self.broadcast_changes()
+        return player
+
+    def leave(self, conn, player_id):
+        """Lock held."""
+        self.subscribers.discard(conn)
+        self.pings.pop(conn, None)
+        self.round_trips.pop(conn, None)
+        self.room.remove_player(player_id)
+        self.broadcast_changes()
+
+    def handle_timed(self, conn, player_id, command, arrived_ns):
+        """
+        Handles the commands timed by when they arrived: pongs and Fastest
+        Finger answers. Called without the lock, straight after reading the
+        command, with arrived_ns = time.monotonic_ns() taken then, so no wait
+        for the lock can slow an answer down. Returns True if it was one.
+        """
+        cmd = command.get("cmd") if isinstance(command, dict) else None
+        if cmd == "pong":
+            self.pong(conn, command.get("t"), arrived_ns)
+            return True
+        if cmd == "fastest_finger":
+            # Answers are queued without the lock; only the last one in takes it
+            finished = self.room.submit_fastest_finger(
+                player_id, command.get("order"), arrived_ns, self.round_trip(conn))
+            if finished:
+                self.run_timer(partial(self.room.close_fastest_finger, finished))
+            return True
+        return False
+
+    def handle(self, conn, player_id, command):
+        """Applies any other command and answers the connection. Lock held."""
+        if command == "subscribe":
+            # Sent under the lock so no delta can overtake the snapshot
+            self.subscribers.add(conn)
+            self.send(conn, protocol.pack(self.room.get_snapshot()))
+            self.ping([conn])
+            return
+
+        private = self.room.handle_command(player_id, command)
+        self.broadcast_changes()
+        if private is not None:
+            # Lifeline results and errors go to the asking player only. Sent
+            # under the lock, as other connections' broadcasts also write to a
+            # subscriber, and frames must not interleave
+            self.send(conn, protocol.pack(private))
+        elif conn not in self.subscribers:
+            # Subscribers learn about changes from the pushed deltas
+            self.send(conn, self.packed_state())
@@ -0,0 +1,225 @@
+# game_session.py
+
+import random
+
+OPTIONS = ("A", "B", "C", "D")
+# Below this question (the 2,000 one) a single press locks in, and the
+# answer is revealed as soon as everyone has locked in
+INSTANT_QUESTIONS = 5
+LIFELINES = ("fifty", "phone", "audience")
+
+class Contestant:
+    """One player's progress through a game."""
+    def __init__(self, player_id):
+        self.id = player_id
+        self.status = "in"      # "in", "out" (wrong answer), "walked", "won" or "left"
+        self.banked = 0         # Questions answered correctly
+        self.answer = None      # Locked-in option for the current question
+        self.options = OPTIONS  # What 50:50 left on the current question
+        self.lifelines = set(LIFELINES)
+
+    @property
+    def active(self):
+        return self.status == "in"
+
+    def standing(self):
+        return [self.id, self.banked, self.status]
+
+
+class GameSession:
+    """
+    One game played by everyone in a room, decided entirely on the server:
+    it deals the questions, takes lock-ins, runs the lifelines and keeps
+    score. Clients only ever see a question's correct answer once it has
+    been revealed.
+
+    Methods return a list of changes (dicts for GameRoom.record_change,
+    one delta each, in order) and, where it applies, a reply meant only
+    for the player who sent the command. Like GameRoom, it does no locking.
+    """
+    def __init__(self, bank, player_ids, host_id=0, rng=None):
+        self.bank = bank
+        self.question_ids = bank.draw_game()
+        self.host_id = host_id
+        self.rng = rng or random.Random()
+        self.contestants = {pid: Contestant(pid) for pid in player_ids}
+        self.index = -1
+        self.question = None
+        self.over = False
+
+    def start(self):
+        if not self.question_ids:
+            raise ValueError("The question bank is empty")
+        return [self.next_question()]
+
+    # --- Compact state sent to clients ---
+
+    def question_state(self):
+        return {"n": self.index, "text": self.question["question"], "answers": list(self.question["answers"])}
+
+    def locked(self):
+        return [c.id for c in self.contestants.values() if c.active and c.answer]
+
+    def standings(self):
+        return [c.standing() for c in self.contestants.values()]
+
+    def get_state(self):
+        """Everything a client joining or resyncing mid-game needs."""
+        return {
+            "question": self.question_state() if self.question and not self.over else None,
+            "locked": self.locked(),
+            "standings": self.standings(),
+            "over": self.over
+        }
+
+    # --- Flow ---
+
+    def next_question(self):
+        self.index += 1
+        self.question = self.bank.get(self.question_ids[self.index])
+        for c in self.contestants.values():
+            c.answer = None
+            c.options = OPTIONS
+        return {"question": self.question_state()}
+
+    def active(self):
+        return [c for c in self.contestants.values() if c.active]
+
+    def everyone_locked(self):
+        active = self.active()
+        return bool(active) and all(c.answer for c in active)
+
+    def ready_to_reveal(self):
+        """Everyone still playing has locked in, and the host isn't waiting to reveal it."""
+        if not self.everyone_locked():
+            return False
+        host = self.contestants.get(self.host_id)
+        return self.index < INSTANT_QUESTIONS or host is None or not host.active
+
+    def time_up(self, index):
+        """The answer timer for question index ran out. Reveals it if it's still being played."""
+        if self.over or index != self.index:
+            return []
+        return self.reveal(time_up=True)
+
+    def reveal(self, time_up=False):
+        """
+        Resolves the current question for everyone still playing. Anyone
+        who hadn't locked in (only possible once time is up) walks away
+        with what they had.
+        """
+        correct = self.question["correct_answer"]
+        result = {"n": self.index, "correct": correct, "right": [], "out": [], "walked": []}
+        if time_up:
+            result["time_up"] = True
+        for c in self.active():
+            if c.answer is None:
+                c.status = "walked"
+                result["walked"].append(c.id)
+            elif c.answer == correct:
+                c.banked = self.index + 1
+                result["right"].append(c.id)
+            else:
+                c.status = "out"
+                result["out"].append(c.id)
+
+        changes = [{"reveal": result}]
+        if self.active() and self.index + 1 < len(self.question_ids):
+            changes.append(self.next_question())
+        else:
+            changes.append(self.finish())
+        return changes
+
+    def finish(self):
+        for c in self.active():
+            c.status = "won"
+        self.over = True
+        return {"game_over": self.standings()}
+
+    def after_change(self, changes):
+        """Moves the game on if the last change left nobody to wait for."""
+        if self.over:
+            return changes
+        if not self.active():
+            changes.append(self.finish())
+        elif self.ready_to_reveal():
+            changes += self.reveal()
+        return changes
+
+    # --- Commands ---
+
+    def handle(self, player_id, command):
+        """Applies a command dict from a player. Returns (changes, reply)."""
+        c = self.contestants.get(player_id)
+        if self.over or c is None or not c.active or not isinstance(command, dict):
+            return [], None
+        cmd = command.get("cmd")
+
+        if cmd == "answer":
+            option = command.get("option")
+            if c.answer or option not in c.options:
+                return [], None
+            c.answer = option
+            return self.after_change([{"locked": self.locked()}]), None
+
+        if cmd == "reveal":
+            # The host reveals from the 2,000 question on, once everyone has locked in
+            if player_id != self.host_id or not c.answer:
+                return [], None
+            if not self.everyone_locked():
+                return [], {"type": "error", "text": "Waiting for everyone to lock in."}
+            return self.reveal(), None
+
+        if cmd == "walk":
+            if c.answer:
+                return [], None
+            c.status = "walked"
+            return self.after_change([{"walked": [c.id]}]), None
+
+        if cmd == "lifeline":
+            return [], self.use_lifeline(c, command.get("name"))
+
+        return [], None
+
+    def remove_player(self, player_id):
+        c = self.contestants.get(player_id)
+        if self.over or c is None or not c.active:
+            return []
+        c.status = "left"
+        return self.after_change([{"left": [c.id]}])
+
+    # --- Lifelines ---
+
+    def use_lifeline(self, c, name):
+        reply = {"type": "lifeline", "name": name, "ok": False}
+        if name not in c.lifelines or c.answer:
+            return reply
+        c.lifelines.discard(name)
+        reply["ok"] = True
+        correct = self.question["correct_answer"]
+
+        if name == "fifty":
+            keep = self.rng.choice([o for o in OPTIONS if o != correct])
+            c.options = tuple(sorted([correct, keep]))
+            reply["options"] = list(c.options)
+        elif name == "audience":
+            reply["votes"] = self.audience_votes(correct, c.options)
+        # Phone-a-Friend is played out on the client; the server only rules it used
+        return reply
+
+    def audience_votes(self, correct, options):
+        """Percentages per option, leaning towards the correct answer."""
+        votes = [0, 0, 0, 0]
+        correct_vote = 40 + self.rng.randint(0, 30)
+        votes[OPTIONS.index(correct)] = correct_vote
+        others = [i for i, o in enumerate(OPTIONS) if o != correct and o in options]
+        remaining = 100 - correct_vote
+        shares = []
+        for _ in others[:-1]:
+            share = self.rng.randint(0, remaining)
+            shares.append(share)
+            remaining -= share
+        shares.append(remaining)
+        for i, share in zip(others, sorted(shares, reverse=True)):
+            votes[i] = share
+        return votes
@@ -1,18 +1,27 @@
 # gameplay.py
 
 import pygame
-import json
 import time
-import random
+from collections import deque
 from settings import *
 import accessible_output as accessibility
+from timeline import Timeline
+
+# What the server calls each lifeline
+LIFELINE_NAMES = {"1: 50:50": "fifty", "2: Phone a Friend": "phone", "3: Ask the Audience": "audience"}
 
 class Gameplay:
-    def __init__(self, game):
+    """
+    The game as one player sees it. The server deals the questions and
+    decides every answer and lifeline (see game_session.py); this plays
+    the sounds and speech for what it reports, and sends the player's keys.
+    """
+    def __init__(self, game, version=-1, state=None):
         pygame.key.set_repeat(0)
         self.game = game
-        self.screen = game.screen
-        self.questions = []
+        self.screen = game.canvas
+        # The question being played, without its answer until the server reveals it
+        self.q_data = None
         self.current_question_index = 0
         self.money_tree = self.game.config.get_money_tree()
         self.lifelines = {"1: 50:50": True, "2: Phone a Friend": True, "3: Ask the Audience": True}
@@ -21,64 +30,171 @@ class Gameplay:
         # State Management for Answering
         self.selected_answer = None 
         self.is_locked_in = False   
-        
-        self.load_questions()
-        if self.questions:
-            self.setup_new_question()
-
-    def load_questions(self):
-        try:
-            with open('questions.json', 'r') as f:
-                self.questions = json.load(f)
-            if not self.questions:
-                accessibility.speak("Error: Question file is empty. Returning to menu.")
-                self.game.game_state = 'menu'
-        except FileNotFoundError:
-            accessibility.speak("Error: questions.json file not found. Returning to menu.")
-            self.game.game_state = 'menu'
-        except json.JSONDecodeError:
-            accessibility.speak("Error: Could not read the questions.json file. Returning to menu.")
-            self.game.game_state = 'menu'
+
+        # How often a tier sound had been prefetched by the time it was played
+        self.sounds_ready = 0
+        self.sounds_late = []
+
+        # Stings and announcements that play out over the next few seconds
+        self.timeline = Timeline()
+
+        # Phone-a-Friend: None, "ringing" (waiting for pickup) or "clock"
+        self.phone_state = None
+        self.phone_clock_start = 0.0
+
+        # Room messages carry on the lobby's version numbering. They wait
+        # here while a sting plays out, so each is heard in turn.
+        self.version = version
+        self.resyncing = False
+        self.pending = deque()
+        self.locked = []
+
+        if state:
+            self.apply_game_state(state)
+
+    @property
+    def is_host(self):
+        return self.game.player_id == 0
+
+    # --- Messages from the server ---
+
+    def receive(self, messages):
+        self.pending.extend(messages)
+
+    def process_messages(self):
+        messages = self.game.network.poll()
+        if messages is None:
+            accessibility.speak("Lost connection to the server. Returning to menu.")
+            self.game.end_session()
+            return
+        self.pending.extend(messages)
+        while self.pending and not self.timeline.busy and not self.phone_state:
+            self.apply_message(self.pending.popleft())
+            if self.game.game_state != 'gameplay':
+                return
+
+    def resync(self):
+        """Asks for a fresh snapshot, ignoring deltas until it arrives."""
+        self.resyncing = True
+        self.game.network.post("subscribe")
+
+    def apply_message(self, message):
+        msg_type = message.get("type") if isinstance(message, dict) else None
+
+        if msg_type == "snapshot":
+            self.version = message["version"]
+            self.resyncing = False
+            state = message["state"]
+            if not state["game_started"] or not state.get("game"):
+                accessibility.speak("The game has ended. Returning to menu.")
+                self.return_to_menu()
+                return
+            self.apply_game_state(state["game"])
+
+        elif msg_type == "delta":
+            if self.resyncing:
+                return
+            if message["version"] != self.version + 1:
+                # We missed an update; ask for a fresh snapshot
+                self.resync()
+                return
+            self.version = message["version"]
+            if "locked" in message:
+                self.locked = message["locked"]
+            if "reveal" in message:
+                self.apply_reveal(message["reveal"])
+            elif "question" in message:
+                self.setup_new_question(message["question"])
+            elif "game_over" in message:
+                self.apply_game_over(message["game_over"])
+            elif message.get("game_started") is False:
+                accessibility.speak("The host has left. Game over.", interrupt=True)
+                self.timeline.after(2000, self.return_to_menu)
+
+        elif msg_type == "lifeline":
+            self.apply_lifeline(message)
+
+        elif msg_type == "error":
+            accessibility.speak(message.get("text", "The server reported an error."), interrupt=True)
+
+    def apply_game_state(self, state):
+        """Catches up from a snapshot, when joining or after missing an update."""
+        self.locked = state["locked"]
+        question = state["question"]
+        if question and (self.q_data is None or question["n"] != self.current_question_index):
+            self.setup_new_question(question)
+        elif state["over"]:
+            self.apply_game_over(state["standings"])
+
+    @staticmethod
+    def bed_key(idx):
+        """The BGM for a tier. Questions 1 to 5 share one bed."""
+        return "q_bed_1_5" if idx < 5 else f"q_bed_{idx + 1}"
+
+    @staticmethod
+    def final_answer_key(idx):
+        """The final answer sting for a tier."""
+        # 2k or 64k
+        if idx == 5 or idx == 10: return "final_answer_5"
+        # 4k or 125k
+        elif idx == 6 or idx == 11: return "final_answer_6"
+        # 8k or 250k
+        elif idx == 7 or idx == 12: return "final_answer_7"
+        # 16k or 500k
+        elif idx == 8 or idx == 13: return "final_answer_8"
+        # 32k or 1M
+        elif idx == 9 or idx == 14: return "final_answer_9"
+        return "final_answer"
+
+    def tier_sound_keys(self, idx):
+        return [self.bed_key(idx), self.final_answer_key(idx), f"win_{idx}", f"lose_{idx}"]
+
+    def play_tier_sound(self, key, music=False, loops=0):
+        """Plays a tier sound, noting whether the prefetch had it ready."""
+        if self.game.sounds.is_ready(key):
+            self.sounds_ready += 1
+        else:
+            self.sounds_late.append(key)
+            print(f"Sound '{key}' was not prefetched in time")
+        if music:
+            self.game.sounds.play_music(key)
+        else:
+            self.game.sounds.play(key, loops=loops)
+
+    def prefetch_summary(self):
+        total = self.sounds_ready + len(self.sounds_late)
+        if not total:
+            return "No tier sounds played yet."
+        return f"Tier sounds ready when needed: {self.sounds_ready} of {total}."
 
     def play_bgm(self):
         """Helper to play the correct BGM for the current tier."""
-        idx = self.current_question_index
-        if idx < 5:
-            self.game.sounds.play_music("q_bed_1_5")
-        elif idx == 5: self.game.sounds.play_music("q_bed_6")
-        elif idx == 6: self.game.sounds.play_music("q_bed_7")
-        elif idx == 7: self.game.sounds.play_music("q_bed_8")
-        elif idx == 8: self.game.sounds.play_music("q_bed_9")
-        elif idx == 9: self.game.sounds.play_music("q_bed_10")
-        elif idx == 10: self.game.sounds.play_music("q_bed_11")
-        elif idx == 11: self.game.sounds.play_music("q_bed_12")
-        elif idx == 12: self.game.sounds.play_music("q_bed_13")
-        elif idx == 13: self.game.sounds.play_music("q_bed_14")
-        elif idx == 14: self.game.sounds.play_music("q_bed_15")
-
-    def setup_new_question(self):
+        if self.current_question_index < 15:
+            self.play_tier_sound(self.bed_key(self.current_question_index), music=True)
+
+    def setup_new_question(self, question):
         pygame.event.clear()
         
         # Reset Answer State
         self.selected_answer = None
         self.is_locked_in = False
         self.answers_to_display = ['A', 'B', 'C', 'D']
+        self.locked = []
         
-        if not self.questions or self.current_question_index >= len(self.questions) or self.current_question_index >= len(self.money_tree):
-            winnings = self.money_tree[len(self.questions) - 1]
-            self.game.sounds.play("win_14")
-            duration = self.game.sounds.get_length("win_14")
-            pygame.time.wait(int(duration * 1000) + 500)
-            accessibility.speak(f"Congratulations! You have answered all the questions and won {winnings}!")
-            pygame.time.wait(2000)
-            self.game.game_state = 'menu'
-            return
-        
+        # Load this tier's sounds (if they aren't already) and the next
+        # tier's in the background while the question is read out
+        idx = self.current_question_index = question["n"]
+        keys = self.tier_sound_keys(idx)
+        if idx + 1 < len(self.money_tree):
+            keys += self.tier_sound_keys(idx + 1)
+        self.game.sounds.prefetch(keys)
+
+        self.q_data = {"question": question["text"], "answers": question["answers"]}
         self.play_bgm()
         self.announce_question()
 
     def announce_question(self):
-        q_data = self.questions[self.current_question_index]
+        q_data = self.q_data
         question_text = q_data['question']
         all_answers = q_data['answers']
         prize_money = self.money_tree[self.current_question_index]
@@ -91,12 +207,35 @@ class Gameplay:
         should_interrupt = self.game.config.data["speech_interrupt"]
         accessibility.speak(full_announcement, interrupt=should_interrupt)
 
+    def update(self):
+        """Called every frame by the main loop."""
+        self.timeline.update()
+        if self.phone_state == "clock" and self.phone_time_left() <= 0:
+            self.end_phone_call()
+        # A finished sequence may already have taken us back to the menu
+        if self.game.game_state == 'gameplay':
+            self.process_messages()
+
+    def return_to_menu(self):
+        self.game.game_state = 'menu'
+
     def handle_event(self, event):
+        # Keys pressed while a sting plays out are ignored, as they always were
+        if self.timeline.busy:
+            return
+        if self.phone_state:
+            self.handle_phone_event(event)
+            return
         if event.type == pygame.KEYDOWN:
             # 1. LOCKED IN STATE: Waiting for Host Reveal
             if self.is_locked_in:
                 if event.key == pygame.K_RETURN:
-                    self.reveal_answer()
+                    if self.current_question_index < 5:
+                        accessibility.speak("Waiting for the other players.")
+                    elif self.is_host:
+                        self.game.network.post({"cmd": "reveal"})
+                    else:
+                        accessibility.speak("Waiting for the host to reveal the answer.")
                 return 
 
             # 2. NORMAL GAMEPLAY
@@ -112,8 +251,10 @@ class Gameplay:
                 else:
                     # Index 5 is the 2,000 question.
                     if self.current_question_index < 5:
+                        # Revealed as soon as everyone is in
                         self.selected_answer = answer_key
-                        self.reveal_answer() # Instant
+                        self.is_locked_in = True
+                        self.game.network.post({"cmd": "answer", "option": answer_key})
                     else:
                         if self.selected_answer == answer_key:
                             self.lock_in_answer(answer_key)
@@ -135,62 +276,63 @@ class Gameplay:
 
     def lock_in_answer(self, option):
         self.is_locked_in = True
+        self.game.network.post({"cmd": "answer", "option": option})
         self.game.sounds.stop_music()
         
-        idx = self.current_question_index
-        sound_key = None
-        
-        # 2k or 64k
-        if idx == 5 or idx == 10: sound_key = "final_answer_5"
-        # 4k or 125k
-        elif idx == 6 or idx == 11: sound_key = "final_answer_6"
-        # 8k or 250k
-        elif idx == 7 or idx == 12: sound_key = "final_answer_7"
-        # 16k or 500k
-        elif idx == 8 or idx == 13: sound_key = "final_answer_8"
-        # 32k or 1M
-        elif idx == 9 or idx == 14: sound_key = "final_answer_9"
-        else: sound_key = "final_answer" 
-        
-        if sound_key:
-            self.game.sounds.play(sound_key)
+        self.play_tier_sound(self.final_answer_key(self.current_question_index))
         
-        accessibility.speak(f"{option} Locked In. Waiting for result.", interrupt=True)
+        waiting = "Press Enter to reveal." if self.is_host else "Waiting for result."
+        accessibility.speak(f"{option} Locked In. {waiting}", interrupt=True)
 
-    def reveal_answer(self):
-        """Resolves the question."""
-        correct_answer = self.questions[self.current_question_index]['correct_answer']
+    def apply_reveal(self, result):
+        """Plays out the server's verdict on the current question."""
+        correct_answer = result["correct"]
+        me = self.game.player_id
         
         self.game.sounds.stop_music() 
         self.game.sounds.stop_all() 
 
-        if self.selected_answer == correct_answer:
+        if me in result["right"]:
             sound_key = f"win_{self.current_question_index}"
-            self.game.sounds.play(sound_key)
+            self.play_tier_sound(sound_key)
             
             duration = self.game.sounds.get_length(sound_key)
             wait_ms = int(duration * 1000) + 500
             
-            pygame.time.wait(wait_ms)
-            
             winnings = self.money_tree[self.current_question_index]
-            accessibility.speak(f"Correct! You have won {winnings}.", interrupt=True)
-            
-            pygame.time.wait(1000)
-            pygame.event.clear()
-            self.current_question_index += 1
-            self.setup_new_question() 
-        else:
+            self.timeline.after(wait_ms, lambda: accessibility.speak(f"Correct! You have won {winnings}.", interrupt=True))
+            # The next question (or the end of the game) waits in self.pending until then
+            self.timeline.after(1000)
+        elif me in result["out"]:
             sound_key = f"lose_{self.current_question_index}"
-            self.game.sounds.play(sound_key)
+            self.play_tier_sound(sound_key)
             
             duration = self.game.sounds.get_length(sound_key)
             wait_ms = int(duration * 1000) + 500
-            pygame.time.wait(wait_ms)
             
-            accessibility.speak(f"Incorrect. The correct answer was {correct_answer}. Game over.", interrupt=True)
-            pygame.time.wait(2000)
-            self.game.game_state = 'menu'
+            self.timeline.after(wait_ms, lambda: accessibility.speak(
+                f"Incorrect. The correct answer was {correct_answer}. Game over.", interrupt=True))
+            self.timeline.after(2000, self.return_to_menu)
+        elif me in result["walked"]:
+            # Time ran out before we locked in
+            if result.get("time_up"):
+                accessibility.speak("Time is up.", interrupt=True)
+            self.walk_away(local=False)
+        else:
+            accessibility.speak(f"The correct answer was {correct_answer}.", interrupt=True)
+
+    def apply_game_over(self, standings):
+        mine = next((s for s in standings if s[0] == self.game.player_id), None)
+        if mine and mine[2] == "won":
+            winnings = self.money_tree[mine[1] - 1]
+            self.game.sounds.play("win_14")
+            duration = self.game.sounds.get_length("win_14")
+            self.timeline.after(int(duration * 1000) + 500, lambda: accessibility.speak(
+                f"Congratulations! You have answered all the questions and won {winnings}!"))
+        elif mine is None:
+            # Watching a game that started before we joined
+            accessibility.speak("The game is over.")
+        self.timeline.after(2000, self.return_to_menu)
 
     def use_lifeline(self, name):
         if self.is_locked_in:
@@ -201,138 +343,115 @@ class Gameplay:
             self.game.sounds.play("lifeline")
             accessibility.speak(f"Using {name}.", interrupt=True)
             self.lifelines[name] = False
-            pygame.time.wait(1000)
-            pygame.event.clear()
-            
-            if name == "1: 50:50": self._use_fifty_fifty()
-            elif name == "2: Phone a Friend": self._use_phone_a_friend()
-            elif name == "3: Ask the Audience": self._use_ask_the_audience()
+            # The server's answer is played out once this pause is over
+            self.game.network.post({"cmd": "lifeline", "name": LIFELINE_NAMES[name]})
+            self.timeline.after(1000, pygame.event.clear)
         else:
             accessibility.speak(f"You have already used the {name} lifeline.", interrupt=True)
 
-    def _use_fifty_fifty(self):
-        correct_answer = self.questions[self.current_question_index]['correct_answer']
+    def apply_lifeline(self, result):
+        if not result.get("ok"):
+            accessibility.speak("That lifeline is not available now.", interrupt=True)
+            return
+        name = result["name"]
+        if name == "fifty": self._use_fifty_fifty(result["options"])
+        elif name == "phone": self._use_phone_a_friend()
+        elif name == "audience": self._use_ask_the_audience(result["votes"])
+
+    def _use_fifty_fifty(self, options):
         all_answers = ['A', 'B', 'C', 'D']
-        incorrect_answers = [ans for ans in all_answers if ans != correct_answer]
-        answer_to_keep = random.choice(incorrect_answers)
-        self.answers_to_display = sorted([correct_answer, answer_to_keep])
+        self.answers_to_display = sorted(options)
+        if self.selected_answer not in self.answers_to_display:
+            self.selected_answer = None
         removed_options = [ans for ans in all_answers if ans not in self.answers_to_display]
         accessibility.speak(f"The computer has removed options {removed_options[0]} and {removed_options[1]}. The remaining options are {self.answers_to_display[0]} and {self.answers_to_display[1]}.")
 
     def _use_phone_a_friend(self):
-        # 1. Start Call Sequence (Blocking)
+        # 1. Start Call Sequence: ring until the host says the friend picked up
         self.game.sounds.stop_music()
         self.game.sounds.play("paf_call", loops=-1)
+        self.phone_state = "ringing"
         
         accessibility.speak("Calling friend. Host, press Enter when they answer.", interrupt=True)
-        
-        # Wait for pickup
-        picked_up = False
-        while not picked_up:
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.game.quit()
-                if event.type == pygame.KEYDOWN and event.key == pygame.K_RETURN:
-                    picked_up = True
-                    break
-            self.game.clock.tick(60) 
-        
-        self.game.sounds.stop_all() # Stop Ringing
-        
+
+    def handle_phone_event(self, event):
+        if event.type != pygame.KEYDOWN:
+            return
+        if self.phone_state == "ringing":
+            if event.key == pygame.K_RETURN:
+                self.start_phone_clock()
+        elif self.phone_state == "clock":
+            friend_answer = None
+            if event.key == pygame.K_a: friend_answer = "A"
+            elif event.key == pygame.K_b: friend_answer = "B"
+            elif event.key == pygame.K_c: friend_answer = "C"
+            elif event.key == pygame.K_d: friend_answer = "D"
+            if friend_answer:
+                self.end_phone_call(friend_answer)
+
+    def start_phone_clock(self):
         # 2. Start Clock
+        self.game.sounds.stop_all() # Stop Ringing
         self.game.sounds.play("paf_clock")
-        start_time = time.time()
-        clock_running = True
-        answered_early = False
-        friend_answer = ""
-        
+        self.phone_state = "clock"
+        self.phone_clock_start = time.monotonic()
         accessibility.speak("Clock started. Host, press A, B, C, or D if friend answers early.", interrupt=True)
 
-        while clock_running:
-            elapsed = time.time() - start_time
-            if elapsed >= 30:
-                clock_running = False
-                break
-                
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    self.game.quit()
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_a: friend_answer = "A"
-                    elif event.key == pygame.K_b: friend_answer = "B"
-                    elif event.key == pygame.K_c: friend_answer = "C"
-                    elif event.key == pygame.K_d: friend_answer = "D"
-                    
-                    if friend_answer:
-                        answered_early = True
-                        clock_running = False
-                        break
-                        
-            self.game.clock.tick(60)
-            
+    def phone_time_left(self):
+        return max(0.0, PHONE_CLOCK_SECONDS - (time.monotonic() - self.phone_clock_start))
+
+    def end_phone_call(self, friend_answer=None):
         self.game.sounds.stop_all() # Stop Clock
+        self.phone_state = None
         
         # 3. Resolution
-        if answered_early:
+        if friend_answer:
             self.game.sounds.play("paf_end_early")
             # Calculate dynamic wait + 125ms padding
             duration = self.game.sounds.get_length("paf_end_early")
-            pygame.time.wait(int(duration * 1000) + 125)
-            
-            accessibility.speak(f"Your friend says the answer is {friend_answer}.")
+            self.timeline.after(int(duration * 1000) + 125, lambda: accessibility.speak(
+                f"Your friend says the answer is {friend_answer}."))
         else:
             # Timeout wait + 125ms padding
-            pygame.time.wait(125)
-            accessibility.speak("The 30 seconds are up. Your friend did not answer in time.")
+            self.timeline.after(125, lambda: accessibility.speak(
+                f"The {PHONE_CLOCK_SECONDS} seconds are up. Your friend did not answer in time."))
             
         # Restore Background Music
-        self.play_bgm()
+        self.timeline.after(0, self.play_bgm)
 
-    def _use_ask_the_audience(self):
-        correct_answer = self.questions[self.current_question_index]['correct_answer']
-        percentages = [0, 0, 0, 0]
-        correct_vote = 40 + random.randint(0, 30)
-        percentages[ord(correct_answer) - ord('A')] = correct_vote
-        remaining_vote = 100 - correct_vote
-        p1 = random.randint(0, remaining_vote)
-        p2 = random.randint(0, remaining_vote - p1)
-        p3 = remaining_vote - p1 - p2
-        temp_percentages = sorted([p1, p2, p3], reverse=True)
-        idx = 0
-        for i in range(4):
-            if i != (ord(correct_answer) - ord('A')):
-                percentages[i] = temp_percentages[idx]
-                idx += 1
+    def _use_ask_the_audience(self, percentages):
         announcement = f"The audience results are: A {percentages[0]}%, B {percentages[1]}%, C {percentages[2]}%, D {percentages[3]}%."
         accessibility.speak(announcement)
 
-    def walk_away(self):
+    def walk_away(self, local=True):
+        if local:
+            self.game.network.post({"cmd": "walk"})
         winnings = "nothing" if self.current_question_index == 0 else self.money_tree[self.current_question_index - 1]
         self.game.sounds.stop_music()
         self.game.sounds.play("walk_away")
         duration = self.game.sounds.get_length("walk_away")
-        pygame.time.wait(int(duration * 1000) + 500)
-        accessibility.speak(f"You have chosen to walk away with {winnings}. Congratulations!", interrupt=True)
-        pygame.time.wait(2000)
-        self.game.game_state = 'menu'
+        self.timeline.after(int(duration * 1000) + 500, lambda: accessibility.speak(
+            f"You have chosen to walk away with {winnings}. Congratulations!", interrupt=True))
+        self.timeline.after(2000, self.return_to_menu)
 
     def draw(self):
-        if not self.questions or self.current_question_index >= len(self.questions): return
+        if not self.q_data: return
 
         colors = self.game.config.colors
+        render = self.game.config.text_cache.render
         font_main = self.game.config.fonts["main"]
         font_title = self.game.config.fonts["title"]
         font_small = self.game.config.fonts["small"]
 
         prize_money = self.money_tree[self.current_question_index]
         winnings_text = f"Question Value: {prize_money}"
-        winnings_surface = font_title.render(winnings_text, True, colors["highlight"])
+        winnings_surface = render(font_title, winnings_text, colors["highlight"])
         winnings_rect = winnings_surface.get_rect(center=(SCREEN_WIDTH / 2, 50))
         self.screen.blit(winnings_surface, winnings_rect)
         
-        q_data = self.questions[self.current_question_index]
+        q_data = self.q_data
         question_text = q_data['question']
-        question_surface = font_title.render(question_text, True, colors["text"])
+        question_surface = render(font_title, question_text, colors["text"])
         question_rect = question_surface.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 4))
         self.screen.blit(question_surface, question_rect)
 
@@ -349,14 +468,28 @@ class Gameplay:
                 elif label == self.selected_answer:
                     text_color = colors["highlight"]
 
-                answer_surface = font_main.render(answer_text, True, text_color)
+                answer_surface = render(font_main, answer_text, text_color)
                 x_pos = SCREEN_WIDTH / 4 + (i % 2) * (SCREEN_WIDTH / 2)
                 y_pos = SCREEN_HEIGHT / 2 + (i // 2) * 150
                 answer_rect = answer_surface.get_rect(center=(x_pos, y_pos))
                 self.screen.blit(answer_surface, answer_rect)
         
+        if self.phone_state:
+            if self.phone_state == "clock":
+                phone_text = f"Phone a Friend: {int(self.phone_time_left() + 0.999)}"
+            else:
+                phone_text = "Phone a Friend: Calling..."
+            phone_surface = render(font_main, phone_text, colors["highlight"])
+            phone_rect = phone_surface.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT - 150))
+            self.screen.blit(phone_surface, phone_rect)
+
+        if self.locked:
+            locked_surface = render(font_small, f"Locked in: {len(self.locked)}", colors["dim"])
+            locked_rect = locked_surface.get_rect(topright=(SCREEN_WIDTH - 20, 20))
+            self.screen.blit(locked_surface, locked_rect)
+
         for i, (name, available) in enumerate(self.lifelines.items()):
             color = colors["text"] if available else colors["dim"]
-            lifeline_surface = font_small.render(name, True, color)
+            lifeline_surface = render(font_small, name, color)
             lifeline_rect = lifeline_surface.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT - 100 + i * 40))
             self.screen.blit(lifeline_surface, lifeline_rect)
\ No newline at end of file
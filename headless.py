@@ -0,0 +1,98 @@
+# headless.py
+#
+# Running the client without a window, sound card or screen reader, driven
+# by a script instead of a keyboard. Used by the bot soak test
+# (benchmarks/soak_bots.py):
+#     python main.py --headless --script bot.json
+
+import json
+import os
+import time
+import pygame
+
+HEADLESS_ENV = "MILLIONAIRE_HEADLESS"
+
+def enable():
+    """Switches to the SDL dummy drivers and silent speech. Call before pygame.init."""
+    os.environ[HEADLESS_ENV] = "1"
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    os.environ["SDL_AUDIODRIVER"] = "dummy"
+
+def is_enabled():
+    return os.environ.get(HEADLESS_ENV) == "1"
+
+
+class ScriptedInput:
+    """
+    Plays a list of steps into the game, one frame at a time. Each step is
+    a dict with one action:
+        {"wait": 1.5}                          pause for this many seconds
+        {"until": "gameplay", "timeout": 30}   wait for a game state
+        {"key": "a"}                           press and release a key
+        {"connect": {"host": "127.0.0.1", "port": 50550, "name": "Bot 1"}}
+        {"resync": true}                       re-subscribe in the lobby (times the round trip)
+        {"repeat": 5, "steps": [...]}          run the nested steps again and again
+        {"quit": true}                         leave the main loop
+    """
+    def __init__(self, steps):
+        self.steps = list(steps)
+        self.step_start = None
+        self.failed = None
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    @property
+    def done(self):
+        return not self.steps
+
+    def update(self, game):
+        """Runs steps until one has to wait. Call once per frame."""
+        now = time.monotonic()
+        while self.steps:
+            if self.step_start is None:
+                self.step_start = now
+            step = self.steps[0]
+            if not self.run_step(game, step, now - self.step_start):
+                return
+            self.steps.pop(0)
+            self.step_start = None
+
+    def run_step(self, game, step, elapsed):
+        """Returns True once the step is finished."""
+        if "wait" in step:
+            return elapsed >= step["wait"]
+        if "until" in step:
+            if game.game_state == step["until"]:
+                return True
+            if elapsed >= step.get("timeout", 60):
+                self.fail(game, f"timed out waiting for '{step['until']}' (in '{game.game_state}')")
+            return False
+        if "key" in step:
+            key = pygame.key.key_code(step["key"])
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=key, mod=0, unicode=step["key"] if len(step["key"]) == 1 else ""))
+            pygame.event.post(pygame.event.Event(pygame.KEYUP, key=key, mod=0))
+        elif "connect" in step:
+            target = step["connect"]
+            if "name" in target:
+                game.config.data["player_name"] = target["name"]
+            game.connect_to_server(target.get("host", "127.0.0.1"), target.get("port", 50550), target.get("lobby"))
+        elif "resync" in step:
+            if game.game_state == 'lobby' and game.lobby:
+                game.lobby.resync()
+        elif "repeat" in step:
+            count = step["repeat"]
+            if count > 1:
+                self.steps.insert(1, dict(step, repeat=count - 1))
+            self.steps[1:1] = step["steps"]
+        elif "quit" in step:
+            game.running = False
+        return True
+
+    def fail(self, game, reason):
+        self.failed = reason
+        print(f"Script failed: {reason}")
+        self.steps.clear()
+        game.running = False
@@ -0,0 +1,209 @@
+# heartbeat.py
+
+import http.client
+import json
+import random
+import socket
+import struct
+import threading
+import time
+import urllib.parse
+
+# --- UDP Heartbeat Packets ---
+# Header: magic, version, kind, game port, players, max players.
+# A ping is the bare 8-byte header; a full heartbeat appends the lobby name
+# and host name, each as a 1-byte length followed by UTF-8 text.
+UDP_HEADER = struct.Struct("!2sBBHBB")
+UDP_MAGIC = b"MA"
+UDP_VERSION = 1
+UDP_PING = 0
+UDP_FULL = 1
+# Sent back by the spy service when it gets a ping for a lobby it doesn't know
+UDP_NACK = b"MA?"
+MAX_UDP_TEXT = 64
+
+def _pack_text(text):
+    raw = str(text).encode('utf-8')[:MAX_UDP_TEXT]
+    return bytes([len(raw)]) + raw
+
+def pack_udp_heartbeat(lobby_data, full=True):
+    header = UDP_HEADER.pack(UDP_MAGIC, UDP_VERSION, UDP_FULL if full else UDP_PING,
+                             int(lobby_data["port"]),
+                             min(255, int(lobby_data.get("players", 0))),
+                             min(255, int(lobby_data.get("max_players", 4))))
+    if not full:
+        return header
+    return header + _pack_text(lobby_data.get("name", "")) + _pack_text(lobby_data.get("host", ""))
+
+def unpack_udp_heartbeat(packet):
+    """
+    Returns (kind, lobby_data) from a heartbeat packet.
+    Raises ValueError if the packet is malformed.
+    """
+    if len(packet) < UDP_HEADER.size:
+        raise ValueError("Short packet")
+    magic, version, kind, port, players, max_players = UDP_HEADER.unpack_from(packet)
+    if magic != UDP_MAGIC or version != UDP_VERSION:
+        raise ValueError("Not a heartbeat packet")
+    data = {"port": port}
+    if kind == UDP_FULL:
+        pos = UDP_HEADER.size
+        texts = []
+        for _ in range(2):
+            if pos >= len(packet):
+                raise ValueError("Truncated packet")
+            length = packet[pos]
+            texts.append(bytes(packet[pos + 1:pos + 1 + length]).decode('utf-8', errors='replace'))
+            pos += 1 + length
+        data = {"name": texts[0], "host": texts[1], "port": port,
+                "players": players, "max_players": max_players}
+    elif kind != UDP_PING:
+        raise ValueError("Unknown heartbeat kind")
+    return kind, data
+
+class ConnectionPool:
+    """
+    Keeps idle keep-alive HTTP connections to one host for reuse, so a
+    heartbeat doesn't pay for a new TCP connection every time.
+    """
+    def __init__(self, scheme, host, port, size=2, timeout=10):
+        self.connection_class = http.client.HTTPSConnection if scheme == "https" else http.client.HTTPConnection
+        self.host = host
+        self.port = port
+        self.size = size
+        self.timeout = timeout
+        self.idle = []
+        self.lock = threading.Lock()
+
+    def request(self, method, path, body=None, headers=None):
+        """Sends a request and returns (status, body). Raises on network errors."""
+        with self.lock:
+            conn = self.idle.pop() if self.idle else None
+        reused = conn is not None
+        if conn is None:
+            conn = self.connection_class(self.host, self.port, timeout=self.timeout)
+
+        try:
+            conn.request(method, path, body=body, headers=headers or {})
+            response = conn.getresponse()
+            data = response.read()
+        except (http.client.RemoteDisconnected, ConnectionError):
+            conn.close()
+            if not reused: raise
+            # The server dropped the idle connection; try once on a fresh one
+            conn = self.connection_class(self.host, self.port, timeout=self.timeout)
+            try:
+                conn.request(method, path, body=body, headers=headers or {})
+                response = conn.getresponse()
+                data = response.read()
+            except Exception:
+                conn.close()
+                raise
+        except Exception:
+            # Never hand a broken connection back to the pool
+            conn.close()
+            raise
+
+        if response.will_close:
+            conn.close()
+        else:
+            with self.lock:
+                if len(self.idle) < self.size:
+                    self.idle.append(conn)
+                    conn = None
+            if conn: conn.close()
+        return response.status, data
+
+
+class HeartbeatClient:
+    """
+    Tells the lobby spy service a public lobby is still alive.
+
+    The full lobby details are only posted when they change (or when the
+    spy has forgotten the lobby); otherwise an ID-only ping just extends
+    its expiry. Failed requests are retried with exponential backoff and
+    jitter so many servers don't retry in lockstep after an outage.
+    """
+    def __init__(self, spy_url, retries=3, base_delay=1.0, max_delay=10.0):
+        parts = urllib.parse.urlsplit(spy_url)
+        self.path = parts.path or "/"
+        self.pool = ConnectionPool(parts.scheme, parts.hostname, parts.port)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.last_sent = None
+
+    def beat(self, lobby_data):
+        """Sends one heartbeat. Returns True if the spy service accepted it."""
+        if lobby_data == self.last_sent:
+            status = self._with_retries("POST", f"{self.path}/{lobby_data['port']}/ping")
+            if status == 200:
+                return True
+            if status != 404:
+                return False
+            # The spy restarted or expired us; fall through and re-register
+
+        body = json.dumps(lobby_data).encode('utf-8')
+        status = self._with_retries("POST", self.path, body, {'Content-Type': 'application/json'})
+        if status == 200:
+            self.last_sent = dict(lobby_data)
+            return True
+        self.last_sent = None
+        return False
+
+    def _with_retries(self, method, path, body=None, headers=None):
+        for attempt in range(self.retries + 1):
+            try:
+                status, _ = self.pool.request(method, path, body, headers)
+                # Only server-side errors are worth retrying
+                if status < 500:
+                    return status
+                print(f"Lobby Spy Error: HTTP {status}")
+            except Exception as e:
+                print(f"Lobby Spy Error: {e}")
+            if attempt < self.retries:
+                # "Full jitter" backoff
+                time.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+        return None
+
+
+class UdpHeartbeatClient:
+    """
+    Opt-in alternative to HeartbeatClient that sends fixed-layout UDP
+    packets to the spy service's UDP listener. There is no reply on
+    success; the spy answers an unknown lobby's ping with a NACK, which
+    makes the next beat a full one. Every few beats are sent in full
+    regardless, in case packets were lost.
+    """
+    def __init__(self, spy_url, udp_port, full_every=4):
+        self.addr = (urllib.parse.urlsplit(spy_url).hostname, udp_port)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setblocking(False)
+        self.full_every = full_every
+        self.last_sent = None
+        self.beats_since_full = 0
+
+    def _nacked(self):
+        nacked = False
+        try:
+            while True:
+                if self.sock.recv(16) == UDP_NACK:
+                    nacked = True
+        except (BlockingIOError, OSError):
+            pass
+        return nacked
+
+    def beat(self, lobby_data):
+        full = (lobby_data != self.last_sent or self._nacked()
+                or self.beats_since_full >= self.full_every - 1)
+        try:
+            self.sock.sendto(pack_udp_heartbeat(lobby_data, full), self.addr)
+        except OSError as e:
+            print(f"Lobby Spy Error: {e}")
+            return False
+        if full:
+            self.last_sent = dict(lobby_data)
+            self.beats_since_full = 0
+        else:
+            self.beats_since_full += 1
+        return True
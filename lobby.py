@@ -1,6 +1,7 @@
 # lobby.py
 
 import pygame
+import time
 from settings import *
 import accessible_output as accessibility
 
@@ -10,65 +11,207 @@ class Lobby:
         pygame.event.clear()
         
         self.game = game
-        self.screen = game.screen
+        self.screen = game.canvas
         self.players = []
         self.is_host = (self.game.player_id == 0) 
         self.lobby_name = "Lobby" 
+        self.version = -1
+        # Ignore deltas until the first snapshot arrives
+        self.resyncing = True
+
+        # Fastest Finger First question being answered, if any, and the order keyed in so far
+        self.fastest_finger = None
+        self.ff_order = ""
+        self.ff_submitted = False
+        self.ff_started = 0.0
 
         if self.is_host:
-            accessibility.speak("Lobby created. Waiting for other players to join. Press Enter to start the game.")
+            accessibility.speak("Lobby created. Waiting for other players to join. Press Enter to start the game, or F for Fastest Finger First.")
         else:
             accessibility.speak("Joined lobby. Waiting for the host to start the game.")
 
+        # Ask the server to push changes instead of polling every frame.
+        # The snapshot arrives through update() like any other message.
+        self.resync_sent = None
+        self.resync()
+
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
-            if event.key == pygame.K_RETURN and self.is_host:
+            if self.fastest_finger and event.key != pygame.K_ESCAPE:
+                self.handle_fastest_finger_key(event)
+            elif event.key == pygame.K_f and self.is_host:
+                accessibility.speak("Starting Fastest Finger First.")
+                self.game.network.post("fastest_finger")
+            elif event.key == pygame.K_RETURN and self.is_host:
                 print("Host is starting the game...")
                 accessibility.speak("Starting game.")
-                self.game.network.send("start")
+                self.game.network.post("start")
             elif event.key == pygame.K_ESCAPE:
                 self.game.end_session()
 
-    def update(self):
-        game_state = self.game.network.send("get")
-        if game_state:
-            self.lobby_name = game_state.get("lobby_name", "Lobby")
-            if len(self.players) != len(game_state["players"]):
-                self.players = game_state["players"]
-                player_names = ", ".join([p.name for p in self.players])
-                accessibility.speak(f"Players in {self.lobby_name}: {player_names}")
+    def handle_fastest_finger_key(self, event):
+        if self.ff_submitted:
+            return
+        letter = {pygame.K_a: "A", pygame.K_b: "B", pygame.K_c: "C", pygame.K_d: "D"}.get(event.key)
+        answers = self.fastest_finger["answers"]
+        if letter and letter not in self.ff_order:
+            self.ff_order += letter
+            if len(self.ff_order) == 4:
+                # Timed by the server when it arrives
+                self.game.network.post({"cmd": "fastest_finger", "order": self.ff_order})
+                self.ff_submitted = True
+                accessibility.speak(f"Submitted: {', '.join(self.ff_order)}.", interrupt=True)
             else:
-                 self.players = game_state["players"]
-            if game_state["game_started"]:
-                self.game.start_game()
+                accessibility.speak(f"{letter}: {answers[ord(letter) - ord('A')]}", interrupt=True)
+        elif event.key == pygame.K_BACKSPACE and self.ff_order:
+            self.ff_order = self.ff_order[:-1]
+            accessibility.speak(f"Removed. {', '.join(self.ff_order) or 'Nothing'} so far.", interrupt=True)
+        elif event.key == pygame.K_r:
+            self.announce_fastest_finger()
+
+    def start_fastest_finger(self, question):
+        self.fastest_finger = question
+        self.ff_order = ""
+        self.ff_submitted = False
+        self.ff_started = time.monotonic()
+        self.game.sounds.play_music("fastest_finger", loops=0)
+        self.announce_fastest_finger()
+
+    def announce_fastest_finger(self):
+        question = self.fastest_finger
+        answers = ". ".join(f"{label}: {answer}" for label, answer in zip("ABCD", question["answers"]))
+        accessibility.speak(f"Fastest Finger First. {question['text']} {answers}. "
+                            "Press the four letters in order.", interrupt=True)
+
+    def show_fastest_finger_result(self, result):
+        self.fastest_finger = None
+        self.game.sounds.play_music("theme")
+        names = {p.id: p.name for p in self.players}
+        announcement = f"The correct order was {', '.join(result['order'])}. "
+        if result["winner"] is not None:
+            fastest = result["ranking"][0]
+            announcement += f"Fastest finger: {names.get(fastest[0], 'a player that left')}, in {fastest[2] / 1e6:.2f} seconds. "
         else:
+            announcement += "Nobody got it right. "
+        for place, (player_id, correct, micros) in enumerate(result["ranking"], 1):
+            if player_id == self.game.player_id:
+                verdict = "right" if correct else "wrong"
+                announcement += f"You were {verdict}, in {micros / 1e6:.2f} seconds, and placed {place} of {len(result['ranking'])}."
+        accessibility.speak(announcement, interrupt=True)
+
+    def resync(self):
+        """Asks for a fresh snapshot, ignoring deltas until it arrives."""
+        self.resyncing = True
+        self.resync_sent = time.perf_counter()
+        self.game.network.post("subscribe")
+
+    def update(self):
+        messages = self.game.network.poll()
+        if messages is None:
             accessibility.speak("Lost connection to the server. Returning to menu.")
             self.game.end_session()
+            return
+        for i, message in enumerate(messages):
+            self.apply_message(message)
+            if self.game.game_state != 'lobby':
+                # The game carries on with whatever arrived after the start
+                if self.game.game_state == 'gameplay' and self.game.gameplay:
+                    self.game.gameplay.receive(messages[i + 1:])
+                break
+
+    def apply_message(self, message):
+        """Applies a snapshot or versioned delta pushed by the server."""
+        msg_type = message.get("type") if isinstance(message, dict) else None
+
+        if msg_type == "snapshot":
+            if self.resync_sent is not None:
+                self.game.network.record_round_trip(time.perf_counter() - self.resync_sent)
+                self.resync_sent = None
+            self.version = message["version"]
+            self.resyncing = False
+            state = message["state"]
+            self.lobby_name = state.get("lobby_name", "Lobby")
+            self.set_players(state["players"])
+            if state["game_started"]:
+                self.game.start_game(self.version, state.get("game"))
+
+        elif msg_type == "delta":
+            if self.resyncing:
+                return
+            if message["version"] != self.version + 1:
+                # We missed an update; ask for a fresh snapshot
+                self.resync()
+                return
+            self.version = message["version"]
+            if "added" in message or "removed" in message:
+                removed = message.get("removed", [])
+                players = [p for p in self.players if p.id not in removed]
+                self.set_players(players + message.get("added", []))
+            if "fastest_finger" in message:
+                self.start_fastest_finger(message["fastest_finger"])
+            if "fastest_finger_result" in message:
+                self.show_fastest_finger_result(message["fastest_finger_result"])
+            if message.get("game_started"):
+                self.game.start_game(self.version)
+
+        elif msg_type == "error":
+            accessibility.speak(message.get("text", "The server reported an error."))
+
+    def set_players(self, players):
+        changed = [p.id for p in players] != [p.id for p in self.players]
+        self.players = players
+        if changed:
+            player_names = ", ".join([p.name for p in self.players])
+            accessibility.speak(f"Players in {self.lobby_name}: {player_names}")
 
     def draw(self):
         colors = self.game.config.colors
+        render = self.game.config.text_cache.render
         font_title = self.game.config.fonts["title"]
         font_main = self.game.config.fonts["main"]
         font_small = self.game.config.fonts["small"]
 
         # Draw title
-        title_text = font_title.render(self.lobby_name, True, colors["text"])
+        title_text = render(font_title, self.lobby_name, colors["text"])
         title_rect = title_text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 5))
         self.screen.blit(title_text, title_rect)
         
+        if self.fastest_finger:
+            self.draw_fastest_finger(colors, render, font_main, font_small)
+            return
+
         # Draw player list
         for index, player in enumerate(self.players):
             player_text = f"{player.name}"
-            player_surface = font_main.render(player_text, True, colors["text"])
+            player_surface = render(font_main, player_text, colors["text"])
             player_rect = player_surface.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 2 + index * 70))
             self.screen.blit(player_surface, player_rect)
         
         # Draw instruction
         if self.is_host:
-            inst_text = font_main.render("Press Enter to Start", True, colors["highlight"])
+            inst_text = render(font_main, "Press Enter to Start, F for Fastest Finger", colors["highlight"])
             inst_rect = inst_text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT - 100))
             self.screen.blit(inst_text, inst_rect)
         else:
-            inst_text = font_small.render("Waiting for host...", True, colors["dim"])
+            inst_text = render(font_small, "Waiting for host...", colors["dim"])
             inst_rect = inst_text.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT - 100))
-            self.screen.blit(inst_text, inst_rect)
\ No newline at end of file
+            self.screen.blit(inst_text, inst_rect)
+
+    def draw_fastest_finger(self, colors, render, font_main, font_small):
+        question = self.fastest_finger
+        question_surface = render(font_small, question["text"], colors["text"])
+        question_rect = question_surface.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT / 3))
+        self.screen.blit(question_surface, question_rect)
+
+        for i, (label, answer) in enumerate(zip("ABCD", question["answers"])):
+            color = colors["dim"] if label in self.ff_order else colors["text"]
+            answer_surface = render(font_main, f"{label}: {answer}", color)
+            x_pos = SCREEN_WIDTH / 4 + (i % 2) * (SCREEN_WIDTH / 2)
+            y_pos = SCREEN_HEIGHT / 2 + (i // 2) * 100
+            self.screen.blit(answer_surface, answer_surface.get_rect(center=(x_pos, y_pos)))
+
+        time_left = max(0, question["seconds"] - int(time.monotonic() - self.ff_started))
+        status = "Submitted" if self.ff_submitted else f"Your order: {' '.join(self.ff_order) or '-'}"
+        status_surface = render(font_main, f"{status}   {time_left}", colors["highlight"])
+        status_rect = status_surface.get_rect(center=(SCREEN_WIDTH / 2, SCREEN_HEIGHT - 100))
+        self.screen.blit(status_surface, status_rect)
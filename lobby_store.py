@@ -0,0 +1,281 @@
+# lobby_store.py
+
+import base64
+import bisect
+import gzip
+import heapq
+import json
+import os
+import threading
+import time
+import zlib
+
+class LobbyShard:
+    """
+    One stripe of the lobby registry, guarded by its own lock.
+    Holds the lobbies whose key hashes to it plus a min-heap of their
+    expiry times (with lazy deletion of superseded heartbeat entries).
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.lobbies = {}   # { key: lobby_data }
+        self.expires = {}   # { key: expiry_time }
+        self.heap = []      # [(expiry_time, key)], may hold stale entries
+        self.first_seen = {}  # { key: time of first heartbeat }
+        # Bumped whenever the advertised contents of this shard change
+        self.version = 0
+
+    def register(self, key, data, now, expiry):
+        with self.lock:
+            old = self.lobbies.get(key)
+            if old is None:
+                self.first_seen[key] = now
+            if old != data:
+                self.lobbies[key] = data
+                self.version += 1
+            self._set_expiry(key, expiry)
+            return old is None
+
+    def touch(self, key, expiry):
+        """Extends a known lobby's life without changing its data."""
+        with self.lock:
+            if key not in self.lobbies:
+                return False
+            self._set_expiry(key, expiry)
+            return True
+
+    def _set_expiry(self, key, expiry):
+        self.expires[key] = expiry
+        heapq.heappush(self.heap, (expiry, key))
+        # Stop stale entries piling up when every lobby heartbeats often
+        if len(self.heap) > 4 * len(self.expires) + 64:
+            self.heap = [(exp, k) for k, exp in self.expires.items()]
+            heapq.heapify(self.heap)
+
+    def prune(self, now):
+        pruned = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now:
+                expiry, key = heapq.heappop(self.heap)
+                # Skip entries superseded by a later heartbeat
+                if self.expires.get(key) != expiry:
+                    continue
+                del self.expires[key]
+                del self.lobbies[key]
+                del self.first_seen[key]
+                pruned.append(key)
+            if pruned:
+                self.version += 1
+        return pruned
+
+    def collect(self):
+        """Returns (version, [(key, lobby, first_seen)]) as one consistent read."""
+        with self.lock:
+            return self.version, [(key, data, self.first_seen[key]) for key, data in self.lobbies.items()]
+
+
+SORT_ORDERS = ("name", "players", "age")
+
+def encode_cursor(sort, sort_key):
+    """Turns the sort key of the last lobby on a page into an opaque cursor string."""
+    raw = json.dumps([sort, *sort_key], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip("=")
+
+def decode_cursor(cursor, sort):
+    """Returns the sort key in a cursor. Raises ValueError if it is malformed or for another sort order."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError("Malformed cursor")
+    if not isinstance(values, list) or not values or values[0] != sort:
+        raise ValueError("Cursor is for another sort order")
+    return tuple(values[1:])
+
+class LobbyIndex:
+    """
+    Secondary indexes over one snapshot of the lobby list. Built once each
+    time the list changes, so queries pick a precomputed order (optionally
+    restricted to non-full lobbies) or bisect a name range instead of
+    filtering every lobby.
+
+    Sort orders: "name" (A-Z), "players" (fullest first) and "age"
+    (longest-running first). Every order ends with the lobby's "ip:port"
+    key, so each lobby has a unique sort key, and a page can start right
+    after the last lobby of the previous one even if the list changed in
+    between (keyset paging): no lobby is skipped or shown twice unless its
+    own sort key changed.
+    """
+    def __init__(self, entries):
+        keys = [key for key, _, _ in entries]
+        self.lobbies = [data for _, data, _ in entries]
+        first_seen = [seen for _, _, seen in entries]
+        names = [str(data.get('name', '')).casefold() for data in self.lobbies]
+        players = [self._count(data, 'players', 0) for data in self.lobbies]
+        count = len(self.lobbies)
+
+        self.sort_keys = {
+            "name": [(names[i], keys[i]) for i in range(count)],
+            "players": [(-players[i], names[i], keys[i]) for i in range(count)],
+            "age": [(first_seen[i], keys[i]) for i in range(count)]
+        }
+        self.orders = {sort: sorted(range(count), key=sort_keys.__getitem__)
+                       for sort, sort_keys in self.sort_keys.items()}
+        self.name_order = self.orders["name"]
+        self.sorted_names = [names[i] for i in self.name_order]
+        # Position of each lobby in each order, for sorting name-prefix matches
+        self.ranks = {}
+        for sort, order in self.orders.items():
+            rank = [0] * count
+            for position, i in enumerate(order): rank[i] = position
+            self.ranks[sort] = rank
+
+        self.is_open = [players[i] < self._count(self.lobbies[i], 'max_players', 4) for i in range(count)]
+        self.open_orders = {sort: [i for i in order if self.is_open[i]] for sort, order in self.orders.items()}
+
+    @staticmethod
+    def _count(data, field, default):
+        try: return int(data.get(field, default))
+        except (TypeError, ValueError): return default
+
+    def query(self, open_only=False, prefix="", sort="name", after=None, limit=None):
+        """
+        Returns (page, next_after, total). The page starts after the lobby
+        whose sort key is after (from the start if None); next_after is the
+        sort key of its last lobby, or None on the last page.
+        """
+        if prefix:
+            prefix = prefix.casefold()
+            lo = bisect.bisect_left(self.sorted_names, prefix)
+            hi = bisect.bisect_left(self.sorted_names, prefix + "\U0010ffff")
+            matches = self.name_order[lo:hi]
+            if open_only:
+                matches = [i for i in matches if self.is_open[i]]
+            if sort != "name":
+                matches = sorted(matches, key=self.ranks[sort].__getitem__)
+        else:
+            matches = (self.open_orders if open_only else self.orders)[sort]
+
+        total = len(matches)
+        sort_keys = self.sort_keys[sort]
+        start = 0
+        if after is not None:
+            try:
+                start = bisect.bisect_right(matches, after, key=sort_keys.__getitem__)
+            except TypeError:
+                # A key of the wrong shape can't be compared; treat it like a bad cursor
+                raise ValueError("Malformed cursor")
+        end = len(matches) if limit is None else min(len(matches), start + limit)
+        page = [self.lobbies[i] for i in matches[start:end]]
+        next_after = sort_keys[matches[end - 1]] if end < len(matches) else None
+        return page, next_after, total
+
+
+class LobbyStore:
+    """
+    Registry of public lobbies for the spy service.
+
+    Lobbies are striped over several shards by their "ip:port" key, each
+    with its own lock, so concurrent heartbeats from waitress worker
+    threads rarely wait on each other. Pruning only ever looks at lobbies
+    that have actually expired, thanks to the per-shard expiry heaps.
+
+    The JSON body served to clients is cached and rebuilt only when a lobby
+    is added, removed, or changes its advertised data. Each rebuild bumps
+    the version, which the service uses as the ETag of the lobby list.
+    """
+    def __init__(self, timeout_seconds, shard_count=16):
+        self.timeout = timeout_seconds
+        self.shards = [LobbyShard() for _ in range(shard_count)]
+        # Serializes snapshot rebuilds. Shard locks are only taken briefly
+        # inside it, so heartbeats never wait for a whole rebuild.
+        self.snapshot_lock = threading.Lock()
+        self.snapshot_versions = None
+        self.snapshot = b"[]"
+        self.snapshot_gzip = None
+        self.index = LobbyIndex([])
+        self.version = 0
+        # Keeps ETags from a previous run of the service from matching
+        self.instance = os.urandom(4).hex()
+
+    def shard_for(self, key):
+        # crc32 rather than hash() so the layout is stable between runs
+        return self.shards[zlib.crc32(key.encode('utf-8')) % len(self.shards)]
+
+    def register(self, key, data, now=None):
+        """Adds or refreshes a lobby. Returns True if it was new."""
+        if now is None: now = time.time()
+        return self.shard_for(key).register(key, data, now, now + self.timeout)
+
+    def touch(self, key, now=None):
+        """Refreshes a lobby from an ID-only ping. Returns False if it is unknown."""
+        if now is None: now = time.time()
+        return self.shard_for(key).touch(key, now + self.timeout)
+
+    def prune(self, now=None):
+        """Removes expired lobbies and returns their keys."""
+        if now is None: now = time.time()
+        pruned = []
+        for shard in self.shards:
+            pruned.extend(shard.prune(now))
+        return pruned
+
+    def _refresh(self):
+        versions = tuple(shard.version for shard in self.shards)
+        if versions == self.snapshot_versions:
+            return
+        entries = []
+        versions = []
+        for shard in self.shards:
+            version, shard_entries = shard.collect()
+            versions.append(version)
+            entries.extend(shard_entries)
+        self.snapshot = json.dumps([data for _, data, _ in entries]).encode('utf-8')
+        self.snapshot_gzip = None
+        self.index = LobbyIndex(entries)
+        self.snapshot_versions = tuple(versions)
+        self.version += 1
+
+    def get_snapshot(self, compressed=False):
+        """
+        Returns (etag, body) for the current lobby list. The gzip body is
+        built on first request and reused until the list changes. Its ETag
+        ends in "-gz": a strong validator names one exact body, so the two
+        encodings can't share one.
+        """
+        with self.snapshot_lock:
+            self._refresh()
+            etag = f"{self.instance}-{self.version}"
+            if not compressed:
+                return etag, self.snapshot
+            if self.snapshot_gzip is None:
+                self.snapshot_gzip = gzip.compress(self.snapshot, compresslevel=6)
+            return etag + "-gz", self.snapshot_gzip
+
+    def query(self, open_only=False, prefix="", sort="name", cursor=None, limit=None):
+        """
+        Returns (etag, page, next_cursor, total) from the indexes of the
+        current snapshot. The etag follows the same version as
+        get_snapshot's, since both change only when the lobby list does. Cursors are opaque strings
+        (see encode_cursor); raises ValueError for a malformed one.
+        """
+        after = decode_cursor(cursor, sort) if cursor else None
+        with self.snapshot_lock:
+            self._refresh()
+            etag = f"{self.instance}-{self.version}"
+            index = self.index
+        page, next_after, total = index.query(open_only, prefix, sort, after, limit)
+        next_cursor = encode_cursor(sort, next_after) if next_after is not None else None
+        return etag, page, next_cursor, total
+
+    def __len__(self):
+        return sum(len(shard.lobbies) for shard in self.shards)
+
+    def start_sweeper(self, interval=5.0):
+        """Prunes expired lobbies on a background thread so requests don't have to."""
+        def sweep():
+            while True:
+                time.sleep(interval)
+                for key in self.prune():
+                    print(f"Pruning inactive lobby: {key}")
+        threading.Thread(target=sweep, daemon=True).start()
@@ -2,7 +2,15 @@
 
 import pygame
 import sys
+import time
+import json
+import headless
 from settings import *
+
+# Must be decided before the speech module loads, since it speaks on import
+if __name__ == '__main__' and "--headless" in sys.argv:
+    headless.enable()
+
 import accessible_output as accessibility
 from menu import Menu
 from lobby import Lobby
@@ -10,17 +18,39 @@ from gameplay import Gameplay
 from network import Network
 from config import Config
 from sound_manager import SoundManager
+from frame_timer import FrameTimer
+from canvas import Canvas
+
+# Posted from the network reader thread, so an idle frame wait ends as soon
+# as a message arrives rather than when the next idle frame is due
+NETWORK_EVENT = pygame.event.custom_type()
+
+def post_network_event():
+    try: pygame.event.post(pygame.event.Event(NETWORK_EVENT))
+    except pygame.error: pass  # Already shut down
 
 class Game:
-    def __init__(self):
+    def __init__(self, script=None):
         pygame.init()
         # Ensure repeat is off by default
         pygame.key.set_repeat(0)
         
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
         pygame.display.set_caption(SCREEN_TITLE)
+        # Screens draw through this so only changed areas reach the display
+        self.canvas = Canvas(self.screen)
         self.clock = pygame.time.Clock()
+        # When there was last input or anything new on screen
+        self.last_activity = time.monotonic()
+        # The event that ended an idle wait, handled with the next frame's events
+        self.woken_by = None
+        # Headless bots keep every frame for their end-of-run statistics
+        self.frame_timer = FrameTimer(window=None if headless.is_enabled() else 600)
         self.running = True
+        # ScriptedInput driving the game instead of a player, if any
+        self.script = script
+        # Round trips from connections that have since been closed
+        self.round_trips = []
         
         self.config = Config()
         if self.config.data["fullscreen"]:
@@ -42,12 +72,14 @@ class Game:
     def set_fullscreen(self, full):
         flags = pygame.FULLSCREEN if full else 0
         self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), flags)
+        self.canvas.set_surface(self.screen)
 
-    def connect_to_server(self, ip_address, port=SERVER_PORT):
+    def connect_to_server(self, ip_address, port=SERVER_PORT, lobby_id=None):
         self.network = Network(ip_address, port)
+        self.network.on_message = post_network_event
         my_name = self.config.data["player_name"]
         
-        player_data = self.network.connect(my_name)
+        player_data = self.network.connect(my_name, lobby_id)
         if player_data:
             self.player_id = player_data.id
             role = "Host" if self.player_id == 0 else "Player"
@@ -62,9 +94,10 @@ class Game:
         self.game_state = 'lobby'
         self.lobby = Lobby(self)
 
-    def start_game(self):
+    def start_game(self, version=-1, state=None):
+        """Switches to the game the server has started, carrying on from the lobby's room version."""
         self.game_state = 'gameplay'
-        self.gameplay = Gameplay(self)
+        self.gameplay = Gameplay(self, version, state)
 
     def end_session(self):
         self.game_state = 'menu'
@@ -72,6 +105,8 @@ class Game:
         self.sounds.play_music("theme")
         
         if self.network:
+            self.round_trips.extend(self.network.round_trips)
+            self.network.close()
             self.network = None
         if self.server_process:
             try: self.server_process.terminate()
@@ -88,19 +123,83 @@ class Game:
     def run(self):
         self.sounds.play_music("theme")
         while self.running:
-            self.events()
+            frame_start = time.monotonic()
+            self.frame_timer.start(self.network)
+            if self.script:
+                self.script.update(self)
+            had_input = self.events()
             self.update()
-            self.draw()
-            self.clock.tick(FPS)
+            changed = self.draw()
+            self.frame_timer.stop(self.network, self.config.text_cache.take_frame_time())
+
+            now = time.monotonic()
+            if had_input or changed or self.is_busy():
+                self.last_activity = now
+            # Static screens only need a few frames a second, as long as
+            # input and network messages still get through straight away
+            if now - self.last_activity > IDLE_AFTER_SECONDS:
+                self.wait_idle(1 / IDLE_FPS - (now - frame_start))
+            else:
+                self.clock.tick(FPS)
+
+    def wait_idle(self, seconds):
+        """Sleeps until there is an event (input, or NETWORK_EVENT) or seconds have passed."""
+        if seconds > 0:
+            event = pygame.event.wait(int(seconds * 1000))
+            if event.type != pygame.NOEVENT:
+                self.woken_by = event
+        # Keeps the clock from counting the wait against the next busy frame
+        self.clock.tick()
+
+    def is_busy(self):
+        """
+        True while something is timed to the frame, like a sting sequence,
+        the phone clock, or a lobby resync whose reply is being timed.
+        """
+        if self.game_state == 'lobby' and self.lobby:
+            return self.lobby.resync_sent is not None
+        return (self.game_state == 'gameplay' and self.gameplay is not None
+                and (self.gameplay.timeline.busy or self.gameplay.phone_state is not None))
+
+    def stats(self):
+        """Frame and round-trip statistics for this run, as a dict."""
+        round_trips = sorted(self.round_trips + (self.network.round_trips if self.network else []))
+        def percentile_ms(values, fraction):
+            if not values: return 0.0
+            return values[min(len(values) - 1, int(fraction * len(values)))] * 1000
+        frames = sorted(self.frame_timer.frame_times)
+        return {
+            "frames": len(frames),
+            "frame_avg_ms": sum(frames) / len(frames) * 1000 if frames else 0.0,
+            "frame_p99_ms": percentile_ms(frames, 0.99),
+            "frame_max_ms": frames[-1] * 1000 if frames else 0.0,
+            "round_trips": len(round_trips),
+            "rtt_p50_ms": percentile_ms(round_trips, 0.5),
+            "rtt_p99_ms": percentile_ms(round_trips, 0.99),
+            "rtt_max_ms": round_trips[-1] * 1000 if round_trips else 0.0,
+            "final_state": self.game_state,
+            "script_failed": self.script.failed if self.script else None
+        }
 
     def events(self):
-        for event in pygame.event.get():
+        """Handles pending events. Returns True if there were any."""
+        events = pygame.event.get()
+        if self.woken_by:
+            events.insert(0, self.woken_by)
+            self.woken_by = None
+        for event in events:
             if event.type == pygame.QUIT: self.quit()
             
             if event.type == pygame.KEYDOWN:
                 # --- GLOBAL SHORTCUTS ---
                 if event.key == pygame.K_F1:
                     accessibility.speak("Help: Arrow keys to navigate, Enter to select, Escape to go back.")
+                elif event.key == pygame.K_F12:
+                    report = f"{self.frame_timer.summary()} {self.sounds.cache.summary()}"
+                    if self.game_state == 'gameplay' and self.gameplay:
+                        report += f" {self.gameplay.prefetch_summary()}"
+                    print(report)
+                    accessibility.speak(report)
                 elif event.key == pygame.K_F11:
                     self.config.toggle_fullscreen()
                     self.set_fullscreen(self.config.data["fullscreen"])
@@ -131,17 +230,21 @@ class Game:
             if self.game_state == 'menu': self.menu.handle_event(event)
             elif self.game_state == 'lobby' and self.lobby: self.lobby.handle_event(event)
             elif self.game_state == 'gameplay' and self.gameplay: self.gameplay.handle_event(event)
+        return bool(events)
 
     def update(self):
         if self.game_state == 'lobby' and self.lobby:
             self.lobby.update()
+        elif self.game_state == 'gameplay' and self.gameplay:
+            self.gameplay.update()
 
     def draw(self):
-        self.screen.fill(self.config.colors["bg"])
+        """Draws the frame. Returns False if it was identical to the last one."""
+        self.canvas.begin(self.config.colors["bg"])
         if self.game_state == 'menu': self.menu.draw()
         elif self.game_state == 'lobby' and self.lobby: self.lobby.draw()
         elif self.game_state == 'gameplay' and self.gameplay: self.gameplay.draw()
-        pygame.display.flip()
+        return self.canvas.present()
 
     def quit(self):
         accessibility.speak("Exiting the game. Goodbye!")
@@ -150,6 +253,12 @@ class Game:
         sys.exit()
 
 if __name__ == '__main__':
-    game = Game()
+    # python main.py [--headless] [--script steps.json]
+    script = None
+    if "--script" in sys.argv:
+        script = headless.ScriptedInput.load(sys.argv[sys.argv.index("--script") + 1])
+    game = Game(script)
     try: game.run()
-    finally: pass
\ No newline at end of file
+    finally:
+        if headless.is_enabled():
+            print("BOT_STATS " + json.dumps(game.stats()), flush=True)
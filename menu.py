@@ -4,14 +4,17 @@ import pygame
 import subprocess
 import sys
 import urllib.request
+import urllib.error
+import urllib.parse
 import json
+import gzip
 from settings import *
 import accessible_output as accessibility
 
 class Menu:
     def __init__(self, game):
         self.game = game
-        self.screen = game.screen
+        self.screen = game.canvas
         self.state = "MAIN"
         
         self.game.sounds.play_music("theme")
@@ -26,7 +29,9 @@ class Menu:
         self.join_private_config = {
             "Player Name": self.game.config.data["player_name"],
             "IP Address": "127.0.0.1",
-            "Port": str(SERVER_PORT)
+            "Port": str(SERVER_PORT),
+            # Only needed for multi-lobby servers; blank joins a single-lobby server
+            "Lobby ID": ""
         }
 
         self.join_public_config = {
@@ -35,12 +40,17 @@ class Menu:
 
         self.public_lobbies = []
         self.public_lobby_status = "Loading..."
+        # First page of lobbies the spy service sent us, revalidated with its ETag
+        self.lobby_list_etag = None
+        self.lobby_list_cache = None
+        # Cursor for the next page, fetched when the user scrolls to the end
+        self.lobby_next_cursor = None
 
         self.items = {
             "MAIN": ["Host Game", "Join Game", "Settings", "Quit"],
             "HOST_CONFIG": ["Lobby Name", "Port", "Host Name", "Public", "Start Server", "Back"],
             "JOIN_SELECT": ["Join Private Lobby", "Join Public Lobby", "Back"],
-            "JOIN_PRIVATE": ["Player Name", "IP Address", "Port", "Connect", "Back"],
+            "JOIN_PRIVATE": ["Player Name", "IP Address", "Port", "Lobby ID", "Connect", "Back"],
             "JOIN_PUBLIC": ["Player Name", "Refresh", "Back"],
             "SETTINGS": ["Theme", "Font Size", "Fullscreen", "Currency", "Speech Interrupt", "Lobby Spy URL", "Back"]
         }
@@ -95,7 +105,7 @@ class Menu:
                 value_text = "checked" if state else "unchecked"
             
         elif self.state == "JOIN_PRIVATE":
-            if item_text in ["Player Name", "IP Address", "Port"]:
+            if item_text in ["Player Name", "IP Address", "Port", "Lobby ID"]:
                 control_type = "edit text"
                 value_text = self.join_private_config.get(item_text, "")
                 help_text = "Press Enter to type"
@@ -143,6 +153,10 @@ class Menu:
         self.selected_index = (self.selected_index + direction) % len(current_list)
         self.announce_current_selection()
 
+        # Reaching the last lobby loads the next page, if there is one
+        if self.state == "JOIN_PUBLIC" and self.lobby_next_cursor and self.selected_index == len(current_list) - 2:
+            self.fetch_more_lobbies()
+
     def delete_selection(self, current_val):
         if self.selection_anchor is None: return current_val, self.cursor_pos
         start = min(self.selection_anchor, self.cursor_pos)
@@ -326,7 +340,7 @@ class Menu:
             elif selection == "Back": self.change_state("MAIN")
 
         elif self.state == "JOIN_PRIVATE":
-            if selection in ["IP Address", "Port", "Player Name"]:
+            if selection in ["IP Address", "Port", "Player Name", "Lobby ID"]:
                 self.start_editing()
             elif selection == "Connect": self.connect_private()
             elif selection == "Back": self.change_state("JOIN_SELECT")
@@ -391,36 +405,95 @@ class Menu:
         pygame.event.clear()
         ip = self.join_private_config["IP Address"]
         port_str = self.join_private_config["Port"]
+        lobby_id = self.join_private_config["Lobby ID"].strip() or None
         try:
             port = int(port_str)
-            accessibility.speak(f"Connecting to {ip} on port {port}...")
-            self.game.connect_to_server(ip, port)
+            if lobby_id:
+                accessibility.speak(f"Connecting to lobby {lobby_id} at {ip} on port {port}...")
+            else:
+                accessibility.speak(f"Connecting to {ip} on port {port}...")
+            self.game.connect_to_server(ip, port, lobby_id)
         except ValueError:
             accessibility.speak("Invalid Port number.")
 
+    def request_lobby_page(self, cursor=None, etag=None):
+        """
+        Fetches one page of open lobbies, fullest first.
+        Returns (page, etag); page is None if the server answered 304.
+        """
+        params = {"open": "1", "sort": "players", "limit": str(LOBBY_PAGE_SIZE)}
+        if cursor: params["cursor"] = cursor
+        url = self.game.config.data["lobby_spy_url"]
+        url += ("&" if "?" in url else "?") + urllib.parse.urlencode(params)
+
+        headers = {"Accept-Encoding": "gzip"}
+        if etag:
+            headers["If-None-Match"] = etag
+        req = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(req, timeout=5) as response:
+                body = response.read()
+                if response.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                page = json.loads(body.decode())
+                etag = response.headers.get("ETag")
+        except urllib.error.HTTPError as e:
+            # 304 Not Modified: the cached page is still current
+            if e.code != 304: raise
+            return None, etag
+
+        # Older spy services ignore the query and return the whole list
+        if isinstance(page, list):
+            page = {"lobbies": page, "next_cursor": None, "total": len(page)}
+        return page, etag
+
+    def update_lobby_items(self):
+        lobby_items = []
+        for l in self.public_lobbies:
+            name = l.get('name', 'Unknown')
+            host = l.get('host', 'Unknown')
+            lobby_items.append(f"Lobby: {name} (Host: {host})")
+        self.items["JOIN_PUBLIC"] = ["Player Name", "Refresh"] + lobby_items + ["Back"]
+
     def fetch_public_lobbies(self):
         self.public_lobby_status = "Fetching lobbies..."
         accessibility.speak("Fetching public lobbies list.")
         try:
-            url = self.game.config.data["lobby_spy_url"]
-            req = urllib.request.Request(url)
-            with urllib.request.urlopen(req, timeout=5) as response:
-                data = json.loads(response.read().decode())
-                self.public_lobbies = data 
-                self.public_lobby_status = f"Found {len(self.public_lobbies)} lobbies."
-                lobby_items = []
-                for l in self.public_lobbies:
-                    name = l.get('name', 'Unknown')
-                    host = l.get('host', 'Unknown')
-                    lobby_items.append(f"Lobby: {name} (Host: {host})")
-                self.items["JOIN_PUBLIC"] = ["Player Name", "Refresh"] + lobby_items + ["Back"]
-                accessibility.speak(self.public_lobby_status)
+            page, etag = self.request_lobby_page(etag=self.lobby_list_etag)
+            if page is not None:
+                self.lobby_list_cache = page
+                self.lobby_list_etag = etag
+            page = self.lobby_list_cache
+
+            self.public_lobbies = list(page["lobbies"])
+            self.lobby_next_cursor = page.get("next_cursor")
+            self.public_lobby_status = f"Found {page.get('total', len(self.public_lobbies))} lobbies."
+            self.update_lobby_items()
+            accessibility.speak(self.public_lobby_status)
         except Exception as e:
             print(f"Spy Error: {e}")
             self.public_lobby_status = "Could not fetch lobbies."
+            self.public_lobbies = []
+            self.lobby_next_cursor = None
             self.items["JOIN_PUBLIC"] = ["Player Name", "Refresh", "Back"]
             accessibility.speak("Could not reach Lobby Spy service.")
 
+    def fetch_more_lobbies(self):
+        cursor = self.lobby_next_cursor
+        self.lobby_next_cursor = None
+        try:
+            page, _ = self.request_lobby_page(cursor)
+            # A lobby whose player count changed since the last page may have moved past the cursor
+            listed = {(l.get('ip'), l.get('port')) for l in self.public_lobbies}
+            self.public_lobbies.extend(l for l in page["lobbies"] if (l.get('ip'), l.get('port')) not in listed)
+            self.lobby_next_cursor = page.get("next_cursor")
+            self.update_lobby_items()
+            accessibility.speak(f"Loaded {len(page['lobbies'])} more lobbies.", interrupt=False)
+        except Exception as e:
+            print(f"Spy Error: {e}")
+            # Try again next time the user reaches the end of the list
+            self.lobby_next_cursor = cursor
+
     def handle_event(self, event):
         if event.type == pygame.KEYDOWN:
             if self.editing:
@@ -444,11 +517,12 @@ class Menu:
         elif self.state == "SETTINGS": title = "Settings"
 
         colors = self.game.config.colors
+        render = self.game.config.text_cache.render
         font_main = self.game.config.fonts["main"]
         font_title = self.game.config.fonts["title"]
         font_small = self.game.config.fonts["small"]
         
-        title_surf = font_title.render(title, True, colors["text"])
+        title_surf = render(font_title, title, colors["text"])
         self.screen.blit(title_surf, (SCREEN_WIDTH//2 - title_surf.get_width()//2, 50))
 
         current_items = self.items.get(self.state, [])
@@ -486,7 +560,7 @@ class Menu:
             if is_active:
                 label_str = f"{item_label}: "
                 if item_label == "Lobby Spy URL": label_str = "Lobby Spy: "
-                label_surf = font_main.render(label_str, True, color)
+                label_surf = render(font_main, label_str, color)
                 
                 sel_start = self.cursor_pos
                 sel_end = self.cursor_pos
@@ -498,9 +572,9 @@ class Menu:
                 sel_text = val[sel_start:sel_end]
                 post_text = val[sel_end:]
 
-                pre_surf = font_main.render(pre_text, True, color)
-                sel_surf = font_main.render(sel_text, True, colors["bg"])
-                post_surf = font_main.render(post_text, True, color)
+                pre_surf = render(font_main, pre_text, color)
+                sel_surf = render(font_main, sel_text, colors["bg"])
+                post_surf = render(font_main, post_text, color)
 
                 cursor_rect_h = font_main.get_height()
                 total_w = label_surf.get_width() + pre_surf.get_width() + sel_surf.get_width() + post_surf.get_width()
@@ -514,7 +588,7 @@ class Menu:
 
                 if sel_text:
                     sel_rect = pygame.Rect(current_x, center_y, sel_surf.get_width(), cursor_rect_h)
-                    pygame.draw.rect(self.screen, colors["highlight"], sel_rect)
+                    self.screen.draw_rect(colors["highlight"], sel_rect)
                     self.screen.blit(sel_surf, (current_x, center_y))
                     current_x += sel_surf.get_width()
                 
@@ -523,12 +597,12 @@ class Menu:
                 if self.selection_anchor is None:
                     cursor_x = start_x + label_surf.get_width() + font_main.size(val[:self.cursor_pos])[0]
                     if pygame.time.get_ticks() % 1000 < 500:
-                        pygame.draw.line(self.screen, color, (cursor_x, center_y), (cursor_x, center_y + cursor_rect_h), 2)
+                        self.screen.draw_line(color, (cursor_x, center_y), (cursor_x, center_y + cursor_rect_h), 2)
             else:
-                item_surf = font_main.render(display_text, True, color)
+                item_surf = render(font_main, display_text, color)
                 rect = item_surf.get_rect(center=(center_x, center_y))
                 self.screen.blit(item_surf, rect)
         
         if self.state == "JOIN_PUBLIC":
-            status_surf = font_small.render(self.public_lobby_status, True, colors["dim"])
+            status_surf = render(font_small, self.public_lobby_status, colors["dim"])
             self.screen.blit(status_surf, (20, SCREEN_HEIGHT - 40))
\ No newline at end of file
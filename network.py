@@ -1,38 +1,153 @@
 # network.py
 
 import socket
-import pickle
+import threading
+import queue
+import time
+import protocol
+
+# Placed on the outbound queue to tell the writer thread to stop
+_STOP = object()
 
 class Network:
+    """
+    Client side of the game connection. After the handshake, a reader and a
+    writer thread own the socket: the game loop only ever touches the
+    inbound and outbound queues, so a slow link can never stall a frame.
+    """
     def __init__(self, server_ip, server_port):
         self.client = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         self.server = server_ip
         self.port = server_port
         self.addr = (self.server, self.port)
+        self.inbound = queue.Queue()
+        self.outbound = queue.Queue()
+        self.connected = False
+        # Seconds the calling (main) thread has spent inside Network methods
+        self.main_thread_time = 0.0
+        # Request-to-reply times in seconds, from lobby resyncs
+        self.round_trips = []
+        # Called from the reader thread when messages arrive for poll(), or
+        # the connection is lost, so an idle game loop can wake up for them
+        self.on_message = None
 
-    def connect(self, player_name):
+    def connect(self, player_name, lobby_id=None):
         """
-        Connects to the server, sends the player name, 
-        and receives the assigned Player object (with ID).
+        Connects to the server, sends the player name (and the lobby ID when
+        joining a multi-lobby server), and receives the assigned Player
+        object (with ID).
         """
         try:
             self.client.settimeout(5.0)
             self.client.connect(self.addr)
-            
+
             # --- HANDSHAKE ---
             # Send the player name immediately
-            self.client.send(pickle.dumps(player_name))
-            
+            protocol.send_message(self.client, protocol.make_hello(player_name, lobby_id))
+
             # Receive the assigned Player object
-            return pickle.loads(self.client.recv(4096))
-        except socket.error as e:
+            player = protocol.recv_message(self.client)
+        except (socket.error, EOFError, protocol.ProtocolError) as e:
             print(f"Connection Error: {e}")
             return None
 
-    def send(self, data):
+        if player is None:
+            print("Connection Error: the server rejected the handshake")
+            self.client.close()
+            return None
+
+        # From here on the background threads own the socket
+        self.client.settimeout(None)
+        self.connected = True
+        threading.Thread(target=self._reader_loop, daemon=True).start()
+        threading.Thread(target=self._writer_loop, daemon=True).start()
+        return player
+
+    def _reader_loop(self):
+        decoder = protocol.FrameDecoder()
+        try:
+            while self.connected:
+                chunk = self.client.recv(65536)
+                if not chunk:
+                    if self.connected:
+                        print("Connection closed by server")
+                    break
+                # Anything still queued means the game loop already has a wake-up coming
+                wake = self.inbound.empty()
+                queued = False
+                for message in decoder.feed(chunk):
+                    if isinstance(message, dict) and message.get("type") == "ping":
+                        # Echoed from here rather than the game loop, so the
+                        # server's round trip isn't rounded up to a frame
+                        self.outbound.put(protocol.pack({"cmd": "pong", "t": message.get("t")}))
+                        continue
+                    self.inbound.put(message)
+                    queued = True
+                if queued and wake:
+                    self.wake()
+        except (socket.error, protocol.ProtocolError) as e:
+            if self.connected:
+                print(f"Receive Error: {e}")
+        self.connected = False
+        self.outbound.put(_STOP)
+        self.wake()
+
+    def wake(self):
+        if self.on_message:
+            self.on_message()
+
+    def _writer_loop(self):
+        while True:
+            data = self.outbound.get()
+            if data is _STOP or not self.connected:
+                break
+            try:
+                self.client.sendall(data)
+            except socket.error as e:
+                print(f"Send Error: {e}")
+                self.connected = False
+                break
+
+    def post(self, data):
+        """Queues a command for the writer thread. Returns False if disconnected."""
+        start = time.perf_counter()
+        try:
+            if not self.connected:
+                return False
+            self.outbound.put(protocol.pack(data))
+            return True
+        finally:
+            self.main_thread_time += time.perf_counter() - start
+
+    def record_round_trip(self, seconds):
+        self.round_trips.append(seconds)
+
+    def poll(self):
+        """
+        Returns every message pushed by the server since the last poll,
+        without blocking. Returns None once the connection has been lost
+        and everything received before that has been handed out.
+        """
+        start = time.perf_counter()
+        # Read the flag first so nothing queued before a disconnect is dropped
+        was_connected = self.connected
+        messages = []
+        try:
+            while True:
+                messages.append(self.inbound.get_nowait())
+        except queue.Empty:
+            pass
+        self.main_thread_time += time.perf_counter() - start
+
+        if not messages and not was_connected:
+            return None
+        return messages
+
+    def close(self):
+        self.connected = False
+        self.outbound.put(_STOP)
         try:
-            self.client.send(pickle.dumps(data))
-            return pickle.loads(self.client.recv(4096))
-        except socket.error as e:
-            print(f"Send/Receive Error: {e}")
-            return None
\ No newline at end of file
+            self.client.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self.client.close()
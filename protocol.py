@@ -0,0 +1,268 @@
+# protocol.py
+
+import asyncio
+import struct
+from player import Player
+
+# Every message on the wire is a 4-byte big-endian length header followed by
+# the encoded payload. Payloads use a small tagged binary encoding (similar in
+# spirit to msgpack) so that neither end ever has to unpickle untrusted data.
+HEADER = struct.Struct("!I")
+MAX_MESSAGE_SIZE = 1024 * 1024
+# How deeply lists and dictionaries may nest in a payload
+MAX_DEPTH = 32
+
+# --- Type Tags ---
+T_NONE = 0
+T_FALSE = 1
+T_TRUE = 2
+T_INT = 3
+T_FLOAT = 4
+T_STR = 5
+T_LIST = 6
+T_DICT = 7
+T_PLAYER = 8
+
+_FLOAT = struct.Struct("!d")
+
+
+class ProtocolError(ValueError):
+    """Raised when a frame or payload cannot be encoded or decoded."""
+
+
+# --- Encoding ---
+
+def _write_varint(buf, value):
+    while value > 0x7F:
+        buf.append((value & 0x7F) | 0x80)
+        value >>= 7
+    buf.append(value)
+
+def _write_int(buf, value):
+    # Zigzag so small negative numbers (e.g. player ID -1) stay one byte
+    _write_varint(buf, (value << 1) if value >= 0 else ((-value << 1) - 1))
+
+def _write_str(buf, value):
+    raw = value.encode('utf-8')
+    _write_varint(buf, len(raw))
+    buf += raw
+
+def _encode_into(buf, obj):
+    if obj is None:
+        buf.append(T_NONE)
+    elif obj is True:
+        buf.append(T_TRUE)
+    elif obj is False:
+        buf.append(T_FALSE)
+    elif isinstance(obj, int):
+        buf.append(T_INT)
+        _write_int(buf, obj)
+    elif isinstance(obj, float):
+        buf.append(T_FLOAT)
+        buf += _FLOAT.pack(obj)
+    elif isinstance(obj, str):
+        buf.append(T_STR)
+        _write_str(buf, obj)
+    elif isinstance(obj, (list, tuple)):
+        buf.append(T_LIST)
+        _write_varint(buf, len(obj))
+        for item in obj:
+            _encode_into(buf, item)
+    elif isinstance(obj, dict):
+        buf.append(T_DICT)
+        _write_varint(buf, len(obj))
+        for key, value in obj.items():
+            if not isinstance(key, str):
+                raise ProtocolError(f"Dictionary keys must be strings, not {type(key).__name__}")
+            _write_str(buf, key)
+            _encode_into(buf, value)
+    elif isinstance(obj, Player):
+        buf.append(T_PLAYER)
+        _write_int(buf, obj.id)
+        _write_str(buf, obj.name)
+    else:
+        raise ProtocolError(f"Cannot encode {type(obj).__name__}")
+
+def encode(obj):
+    """Encodes a message payload (without the length header)."""
+    buf = bytearray()
+    _encode_into(buf, obj)
+    return bytes(buf)
+
+def pack(obj):
+    """Encodes a message and prefixes it with its length header."""
+    payload = encode(obj)
+    if len(payload) > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message too large ({len(payload)} bytes)")
+    return HEADER.pack(len(payload)) + payload
+
+
+# --- Decoding ---
+
+def _read_varint(data, pos):
+    result = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ProtocolError("Truncated payload")
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, pos
+        shift += 7
+
+def _read_int(data, pos):
+    value, pos = _read_varint(data, pos)
+    return (value >> 1) ^ -(value & 1), pos
+
+def _read_str(data, pos):
+    length, pos = _read_varint(data, pos)
+    end = pos + length
+    if end > len(data):
+        raise ProtocolError("Truncated payload")
+    try:
+        return bytes(data[pos:end]).decode('utf-8'), end
+    except UnicodeDecodeError:
+        raise ProtocolError("Invalid UTF-8 in string")
+
+def _decode_from(data, pos, depth=0):
+    if depth > MAX_DEPTH:
+        raise ProtocolError("Payload nested too deeply")
+    if pos >= len(data):
+        raise ProtocolError("Truncated payload")
+    tag = data[pos]
+    pos += 1
+
+    if tag == T_NONE: return None, pos
+    if tag == T_FALSE: return False, pos
+    if tag == T_TRUE: return True, pos
+    if tag == T_INT: return _read_int(data, pos)
+    if tag == T_FLOAT:
+        if pos + 8 > len(data):
+            raise ProtocolError("Truncated payload")
+        return _FLOAT.unpack_from(data, pos)[0], pos + 8
+    if tag == T_STR: return _read_str(data, pos)
+    if tag == T_LIST:
+        count, pos = _read_varint(data, pos)
+        items = []
+        for _ in range(count):
+            item, pos = _decode_from(data, pos, depth + 1)
+            items.append(item)
+        return items, pos
+    if tag == T_DICT:
+        count, pos = _read_varint(data, pos)
+        result = {}
+        for _ in range(count):
+            key, pos = _read_str(data, pos)
+            result[key], pos = _decode_from(data, pos, depth + 1)
+        return result, pos
+    if tag == T_PLAYER:
+        player_id, pos = _read_int(data, pos)
+        name, pos = _read_str(data, pos)
+        player = Player(player_id)
+        player.name = name
+        return player, pos
+
+    raise ProtocolError(f"Unknown type tag {tag}")
+
+def decode(data):
+    """Decodes a complete message payload (without the length header)."""
+    obj, pos = _decode_from(memoryview(data), 0)
+    if pos != len(data):
+        raise ProtocolError("Trailing bytes after payload")
+    return obj
+
+
+# --- Handshake ---
+
+def make_hello(player_name, lobby_id=None, lobby_name=None):
+    """
+    Builds the first message a client sends. A bare name is enough for a
+    single-lobby server; a multi-lobby server also needs the lobby ID.
+    """
+    if not lobby_id:
+        return player_name
+    hello = {"name": player_name, "lobby": lobby_id}
+    if lobby_name:
+        hello["lobby_name"] = lobby_name
+    return hello
+
+def parse_hello(message):
+    """Returns (player_name, lobby_id, lobby_name) from a handshake message."""
+    if isinstance(message, str):
+        return message, None, None
+    if isinstance(message, dict) and isinstance(message.get("name"), str):
+        lobby_id, lobby_name = message.get("lobby"), message.get("lobby_name")
+        if all(value is None or isinstance(value, str) for value in (lobby_id, lobby_name)):
+            return message["name"], lobby_id, lobby_name
+    raise ProtocolError("Malformed handshake")
+
+
+# --- Socket Helpers ---
+
+def _recv_exact(sock, size):
+    buf = bytearray()
+    while len(buf) < size:
+        chunk = sock.recv(size - len(buf))
+        if not chunk:
+            raise EOFError("Connection closed")
+        buf += chunk
+    return bytes(buf)
+
+def send_message(sock, obj):
+    sock.sendall(pack(obj))
+
+def recv_message(sock):
+    """
+    Blocks until one whole message has arrived and returns it.
+    Raises EOFError if the peer closes the connection.
+    """
+    (length,) = HEADER.unpack(_recv_exact(sock, HEADER.size))
+    if length > MAX_MESSAGE_SIZE:
+        raise ProtocolError(f"Message too large ({length} bytes)")
+    return decode(_recv_exact(sock, length))
+
+
+# --- Asyncio Stream Helpers ---
+
+async def read_message(reader):
+    """
+    Reads one whole message from an asyncio StreamReader.
+    Raises EOFError if the peer closes the connection.
+    """
+    try:
+        header = await reader.readexactly(HEADER.size)
+        (length,) = HEADER.unpack(header)
+        if length > MAX_MESSAGE_SIZE:
+            raise ProtocolError(f"Message too large ({length} bytes)")
+        payload = await reader.readexactly(length)
+    except asyncio.IncompleteReadError:
+        raise EOFError("Connection closed")
+    return decode(payload)
+
+
+# --- Incremental Decoding ---
+
+class FrameDecoder:
+    """
+    Reassembles whole messages from arbitrary chunks of a byte stream.
+    Used where the caller cannot block waiting for a full frame.
+    """
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def feed(self, data):
+        """Adds received bytes and returns every message they completed."""
+        self.buffer += data
+        messages = []
+        while len(self.buffer) >= HEADER.size:
+            (length,) = HEADER.unpack_from(self.buffer, 0)
+            if length > MAX_MESSAGE_SIZE:
+                raise ProtocolError(f"Message too large ({length} bytes)")
+            end = HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            messages.append(decode(bytes(self.buffer[HEADER.size:end])))
+            del self.buffer[:end]
+        return messages
@@ -0,0 +1,401 @@
+# question_pack.py
+#
+# Builds and reads questions.qpack: questions.json converted to a compact
+# binary bank that the game maps into memory instead of parsing. A question
+# is only decoded when the game reads one of its fields.
+#
+# Convert (run from the repository root, after changing questions.json):
+#     python question_pack.py convert [questions.json] [questions.qpack]
+# Check a JSON bank against the schema, and a pack against its JSON bank:
+#     python question_pack.py validate [questions.json] [questions.qpack]
+#
+# Layout (little-endian):
+#     header   magic, tiers, question count, source size, source mtime (ns)
+#     tiers    question count per tier (u32 each)
+#     ids      every tier's question IDs, tier by tier (u32 each)
+#     records  per question: text offset (u64), UTF-8 lengths of the question
+#              and its four answers (u32 each), correct answer (0-3), tier
+#     text     each question's text followed by its answers, as UTF-8
+
+import argparse
+import array
+import hashlib
+import mmap
+import os
+import shutil
+import signal
+import struct
+import sys
+import tempfile
+import threading
+from collections.abc import Mapping
+
+from question_store import TIERS, QuestionBank, QuestionStore, iter_questions, question_tier, validate_question
+
+MAGIC = b"QSTPACK1"
+HEADER = struct.Struct("<8sHIQq")
+RECORD = struct.Struct("<Q5IBB2x")
+ALIGN = 8
+
+PACK_SUFFIX = ".qpack"
+LETTERS = "ABCD"
+
+class PackedQuestion(Mapping):
+    """
+    One question in a pack, read like the dict json.load would give. Each
+    field is decoded from the map the first time it is read.
+    """
+    FIELDS = ("question", "answers", "correct_answer", "tier")
+
+    def __init__(self, pack, qid):
+        self.pack = pack
+        self.qid = qid
+        self.decoded = {}
+
+    def __getitem__(self, key):
+        if key not in self.decoded:
+            if key not in self.FIELDS:
+                raise KeyError(key)
+            self.decoded[key] = self.pack.decode(self.qid, key)
+        return self.decoded[key]
+
+    def __iter__(self):
+        return iter(self.FIELDS)
+
+    def __len__(self):
+        return len(self.FIELDS)
+
+
+class QuestionPack(QuestionBank):
+    """
+    A memory-mapped questions.qpack. The tier tables are used in place, so
+    opening a pack costs the same however many questions it holds, and
+    pages are only read in from disk as questions are drawn.
+    """
+    def __init__(self, path, rng=None):
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, tiers, count, self.source_size, self.source_mtime = HEADER.unpack_from(self.map)
+            if magic != MAGIC or tiers != TIERS:
+                raise ValueError("not a question pack")
+            self.count = count
+            self.view = memoryview(self.map)
+
+            pos = HEADER.size
+            tier_sizes = self.table(pos, TIERS)
+            pos += 4 * TIERS
+            tier_ids = []
+            for size in tier_sizes:
+                tier_ids.append(self.table(pos, size))
+                pos += 4 * size
+            self.records = pos + -pos % ALIGN
+            if self.records + count * RECORD.size > len(self.map):
+                raise ValueError("Truncated question pack")
+        except (struct.error, ValueError):
+            self.map.close()
+            raise ValueError(f"{path} is not a valid question pack")
+        super().__init__(tier_ids, rng)
+        self.path = path
+
+    def table(self, pos, n):
+        """A u32 table in the map, viewed in place where the byte order allows."""
+        end = pos + 4 * n
+        if end > len(self.map):
+            raise ValueError("Truncated question pack")
+        if sys.byteorder == 'little':
+            return self.view[pos:end].cast('I')
+        values = array.array('I', self.view[pos:end])
+        values.byteswap()
+        return values
+
+    def is_current(self, source_path):
+        """True unless source_path exists and has changed since the pack was built."""
+        try:
+            stat = os.stat(source_path)
+        except FileNotFoundError:
+            return True
+        return (stat.st_size, stat.st_mtime_ns) == (self.source_size, self.source_mtime)
+
+    def __len__(self):
+        return self.count
+
+    def get(self, qid):
+        if not 0 <= qid < self.count:
+            raise IndexError(qid)
+        return PackedQuestion(self, qid)
+
+    def decode(self, qid, field):
+        """Decodes one field of one question."""
+        offset, *lengths, correct, tier = RECORD.unpack_from(self.map, self.records + qid * RECORD.size)
+        if field == "correct_answer":
+            return LETTERS[correct]
+        if field == "tier":
+            return tier
+        if field == "question":
+            return str(self.view[offset:offset + lengths[0]], 'utf-8')
+        answers = []
+        offset += lengths[0]
+        for length in lengths[1:]:
+            answers.append(str(self.view[offset:offset + length], 'utf-8'))
+            offset += length
+        return answers
+
+
+def open_bank(path="questions.json"):
+    """
+    Opens the question bank: the pack built from path when there is an
+    up-to-date one beside it, otherwise path itself through a QuestionStore.
+    """
+    pack_path = os.path.splitext(path)[0] + PACK_SUFFIX
+    if os.path.exists(pack_path):
+        try:
+            pack = QuestionPack(pack_path)
+            if pack.is_current(path):
+                return pack
+            print(f"{pack_path} is older than {path}; reading {path} instead")
+        except ValueError as e:
+            print(e)
+    return QuestionStore.open(path)
+
+
+class SharedBank:
+    """
+    One question bank shared by every game (and, on a server, every room)
+    in the process. Banks are never changed once opened, so games read
+    them without locking; a game keeps the bank it started with, and only
+    draws question IDs from it.
+
+    current() checks the bank's files (size, modification time, inode)
+    each time it is called, and when they have changed reloads them on a
+    background thread, carrying on with the old bank meanwhile. It also
+    keeps a hash of their contents, worked out in the background after the
+    first load, so a touched but unchanged file isn't reloaded again.
+
+    Update the files by replacing them (as convert does), not rewriting
+    them in place: a game still playing the old bank reads from the old file.
+    """
+    def __init__(self, path="questions.json"):
+        self.path = path
+        self.pack_path = os.path.splitext(path)[0] + PACK_SUFFIX
+        self.bank = None
+        self.stamp = None
+        self.digest = None
+        self.reloads = 0
+        self.lock = threading.Lock()
+
+    def file_stamp(self):
+        stamp = []
+        for path in (self.path, self.pack_path):
+            try:
+                stat = os.stat(path)
+                stamp.append((stat.st_size, stat.st_mtime_ns, stat.st_ino))
+            except FileNotFoundError:
+                stamp.append(None)
+        return tuple(stamp)
+
+    def file_digest(self):
+        digest = hashlib.blake2b(digest_size=16)
+        for path in (self.path, self.pack_path):
+            try:
+                with open(path, 'rb') as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(chunk)
+            except FileNotFoundError:
+                pass
+            digest.update(b"\0")
+        return digest.digest()
+
+    def current(self):
+        """
+        The bank to start a game with. Only the first call waits for the
+        bank to load; after that, changed files are reloaded in the
+        background and picked up by a later call. Raises FileNotFoundError
+        or ValueError if there is no usable bank at all.
+        """
+        if self.bank is None:
+            if self.reload(force=False):
+                threading.Thread(target=self.hash_loaded, args=(self.stamp,), daemon=True).start()
+        elif self.file_stamp() != self.stamp and not self.lock.locked():
+            threading.Thread(target=self.reload, args=(False,), daemon=True).start()
+        return self.bank
+
+    def hash_loaded(self, stamp):
+        """Works out the digest of the files the first load read, unless they have changed since."""
+        digest = self.file_digest()
+        with self.lock:
+            if self.digest is None and self.stamp == stamp and self.file_stamp() == stamp:
+                self.digest = digest
+
+    def reload(self, force=True):
+        """
+        Opens the bank's files again and swaps the new bank in; games
+        already running keep the old one. Unless forced, an unchanged bank
+        is kept. While another thread is reloading, returns at once so the
+        caller carries on with the bank that is there (only waiting if
+        there is none yet). Returns True if a new bank was swapped in.
+        """
+        if not self.lock.acquire(blocking=self.bank is None):
+            return False
+        try:
+            stamp = self.file_stamp()
+            if self.bank is None:
+                # Hashed afterwards (see hash_loaded), so startup doesn't wait for it
+                digest = None
+                bank = open_bank(self.path)
+            else:
+                if stamp == self.stamp and not force:
+                    return False
+                digest = self.file_digest()
+                if digest == self.digest and not force:
+                    self.stamp = stamp
+                    return False
+                try:
+                    bank = open_bank(self.path)
+                except (OSError, ValueError) as e:
+                    # Keep playing the old bank until the files are fixed
+                    print(f"Could not reload {self.path}: {e}")
+                    self.stamp = stamp
+                    return False
+                self.reloads += 1
+            self.stamp, self.digest = stamp, digest
+            # Readers only look at self.bank, so each sees the old bank or the new one
+            self.bank = bank
+            return True
+        finally:
+            self.lock.release()
+
+
+_shared = {}
+_shared_lock = threading.Lock()
+
+def shared_bank(path="questions.json"):
+    """The process-wide SharedBank for path."""
+    with _shared_lock:
+        if path not in _shared:
+            _shared[path] = SharedBank(path)
+        return _shared[path]
+
+
+def reload_on_sighup(path="questions.json"):
+    """
+    Makes SIGHUP reload the shared bank for path, for servers. The reload
+    runs on its own thread so connections are never held up by it. Does
+    nothing where there is no SIGHUP (Windows).
+    """
+    if not hasattr(signal, "SIGHUP"):
+        return
+    def handler(signum, frame):
+        threading.Thread(target=shared_bank(path).reload, daemon=True).start()
+    signal.signal(signal.SIGHUP, handler)
+
+
+def check(path):
+    """Yields (qid, question, problems) for every question in a JSON bank."""
+    for qid, question, _, _ in iter_questions(path):
+        yield qid, question, validate_question(question)
+
+def report(problems, limit=20):
+    for qid, problem in problems[:limit]:
+        print(f"Question {qid}: {problem}")
+    if len(problems) > limit:
+        print(f"...and {len(problems) - limit} more problems")
+
+def convert(source="questions.json", output=None):
+    """Checks a JSON bank and writes its pack. Returns the number of problems found (0 if written)."""
+    output = output or os.path.splitext(source)[0] + PACK_SUFFIX
+    stat = os.stat(source)
+    records = bytearray()
+    tier_ids = [array.array('I') for _ in range(TIERS)]
+    problems = []
+    offset = 0
+    with tempfile.TemporaryFile() as text:
+        for qid, question, found in check(source):
+            problems += [(qid, problem) for problem in found]
+            if found:
+                continue
+            strings = [s.encode('utf-8') for s in [question["question"], *question["answers"]]]
+            tier = question_tier(question, qid)
+            records += RECORD.pack(offset, *map(len, strings), LETTERS.index(question["correct_answer"]), tier)
+            tier_ids[tier - 1].append(qid)
+            for s in strings:
+                text.write(s)
+            offset += sum(map(len, strings))
+        if problems:
+            report(problems)
+            print(f"Not writing {output}: fix {source} first")
+            return len(problems)
+
+        count = len(records) // RECORD.size
+        temp = output + ".tmp"
+        with open(temp, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, TIERS, count, stat.st_size, stat.st_mtime_ns))
+            sizes = array.array('I', [len(ids) for ids in tier_ids])
+            if sys.byteorder != 'little':
+                sizes.byteswap()
+                for ids in tier_ids: ids.byteswap()
+            f.write(sizes.tobytes())
+            for ids in tier_ids:
+                f.write(ids.tobytes())
+            f.write(b"\0" * (-f.tell() % ALIGN))
+            # Text offsets are relative to the start of the text section
+            text_start = f.tell() + len(records)
+            for pos in range(0, len(records), RECORD.size):
+                (relative,) = struct.unpack_from("<Q", records, pos)
+                struct.pack_into("<Q", records, pos, text_start + relative)
+            f.write(records)
+            text.seek(0)
+            shutil.copyfileobj(text, f)
+    # Never leave a half-written pack where the game will look for it
+    os.replace(temp, output)
+    print(f"Wrote {output}: {count} questions, {os.path.getsize(output) / 1048576:.1f} MB "
+          f"(from {stat.st_size / 1048576:.1f} MB of JSON)")
+    return 0
+
+def validate(source="questions.json", pack_path=None):
+    """Checks a JSON bank against the schema and, if there is one, its pack against the bank. Returns the number of problems."""
+    pack_path = pack_path or os.path.splitext(source)[0] + PACK_SUFFIX
+    pack = None
+    if os.path.exists(pack_path):
+        pack = QuestionPack(pack_path)
+        if not pack.is_current(source):
+            print(f"{pack_path} was built from an older {source}")
+
+    problems = []
+    count = 0
+    for qid, question, found in check(source):
+        count += 1
+        problems += [(qid, problem) for problem in found]
+        if pack is None or found:
+            continue
+        if qid >= len(pack):
+            problems.append((qid, f"missing from {pack_path}"))
+            continue
+        packed = pack.get(qid)
+        expected = dict(question, tier=question_tier(question, qid))
+        for field in PackedQuestion.FIELDS:
+            if packed[field] != expected[field]:
+                problems.append((qid, f"'{field}' differs in {pack_path}"))
+    if pack is not None and len(pack) > count:
+        problems.append((count, f"{len(pack) - count} extra questions in {pack_path}"))
+
+    report(problems)
+    checked = f"{source} and {pack_path}" if pack is not None else source
+    print(f"Checked {count} questions in {checked}: {len(problems) or 'no'} problems")
+    return len(problems)
+
+def main():
+    parser = argparse.ArgumentParser(description="Question pack converter")
+    parser.add_argument("command", choices=("convert", "validate"))
+    parser.add_argument("source", nargs="?", default="questions.json")
+    parser.add_argument("pack", nargs="?")
+    args = parser.parse_args()
+    try:
+        problems = (convert if args.command == "convert" else validate)(args.source, args.pack)
+    except (OSError, ValueError) as e:
+        print(e)
+        sys.exit(2)
+    sys.exit(1 if problems else 0)
+
+if __name__ == '__main__':
+    main()
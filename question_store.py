@@ -0,0 +1,286 @@
+# question_store.py
+
+import array
+import codecs
+import json
+import os
+import random
+import re
+import struct
+import threading
+
+TIERS = 15
+
+INDEX_MAGIC = b"QIDX"
+INDEX_VERSION = 1
+# magic, version, tiers, question count, source size, source mtime (ns)
+INDEX_HEADER = struct.Struct("<4sHHIQq")
+
+# How much of a JSON bank iter_questions reads at a time
+READ_CHUNK = 1 << 20
+
+_SPACE = re.compile(r"[\s,]*")
+# What can follow a complete value in a JSON list
+_AFTER_VALUE = frozenset(" \t\r\n,]")
+
+class QuestionDeck:
+    """
+    Draws positions 0..size-1 in random order without repeats, one at a
+    time, in O(1) per draw: a Fisher-Yates shuffle done lazily, where only
+    the swapped positions are remembered. Starts over once exhausted.
+    """
+    def __init__(self, size):
+        self.size = size
+        self.remaining = size
+        self.swaps = {}
+
+    def draw(self, rng):
+        if self.remaining == 0:
+            self.remaining = self.size
+            self.swaps.clear()
+        pick = rng.randrange(self.remaining)
+        self.remaining -= 1
+        chosen = self.swaps.get(pick, pick)
+        # Move the last undrawn position into the hole left by this one
+        self.swaps[pick] = self.swaps.pop(self.remaining, self.remaining)
+        return chosen
+
+
+def question_tier(question, qid):
+    """
+    A question's tier (1 to 15) comes from its optional "tier" field. Without
+    one, it is taken from the question's position in the file, so a plain
+    15-question file still plays in file order.
+    """
+    tier = question.get("tier")
+    if not isinstance(tier, int) or not 1 <= tier <= TIERS:
+        tier = qid % TIERS + 1
+    return tier
+
+def validate_question(question):
+    """Returns a list of the ways question breaks the questions.json schema."""
+    if not isinstance(question, dict):
+        return ["not an object"]
+    problems = []
+    if not isinstance(question.get("question"), str) or not question.get("question"):
+        problems.append("'question' must be a non-empty string")
+    answers = question.get("answers")
+    if not isinstance(answers, list) or len(answers) != 4 or not all(isinstance(a, str) for a in answers):
+        problems.append("'answers' must be a list of 4 strings")
+    if question.get("correct_answer") not in ("A", "B", "C", "D"):
+        problems.append("'correct_answer' must be A, B, C or D")
+    if "tier" in question and (not isinstance(question["tier"], int) or not 1 <= question["tier"] <= TIERS):
+        problems.append(f"'tier' must be a whole number from 1 to {TIERS}")
+    return problems
+
+def iter_questions(path, chunk_size=READ_CHUNK):
+    """
+    Yields (qid, question, byte_offset, byte_length) for each question in a
+    JSON bank. The file is read a chunk at a time and each question parsed
+    as soon as it is complete, so memory use doesn't grow with the size of
+    the bank. Raises ValueError if it isn't a JSON list.
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    with open(path, 'rb') as f:
+        text = ""          # Decoded text not yet parsed, from pos on
+        pos = 0
+        pos_bytes = 0      # File offset of text[pos]
+        ascii_only = True  # Character and byte lengths agree throughout text
+        eof = False
+
+        def read_more():
+            """Drops the text already parsed and decodes the next chunk. Returns False at end of file."""
+            nonlocal text, pos, ascii_only, eof
+            if eof:
+                return False
+            data = f.read(chunk_size)
+            eof = not data
+            text = text[pos:] + utf8.decode(data, final=eof)
+            pos = 0
+            ascii_only = text.isascii()
+            return True
+
+        def byte_length(start, end):
+            return end - start if ascii_only else len(text[start:end].encode('utf-8'))
+
+        while not text and read_more():
+            pass
+        if text.startswith("\ufeff"):
+            pos, pos_bytes = 1, 3
+        while True:
+            start = _SPACE.match(text, pos).end()
+            if start < len(text) or not read_more():
+                break
+        if not text.startswith("[", start):
+            raise ValueError("The question bank must be a JSON list")
+        pos_bytes += byte_length(pos, start + 1)
+        pos = start + 1
+
+        qid = 0
+        while True:
+            start = _SPACE.match(text, pos).end()
+            if start == len(text):
+                if read_more():
+                    continue
+                raise ValueError("Unterminated question list")
+            if text[start] == "]":
+                return
+            try:
+                question, end = decoder.raw_decode(text, start)
+            except json.JSONDecodeError as e:
+                # Most likely cut off by the end of the chunk
+                if read_more():
+                    continue
+                # e.pos only counts from the start of the current chunk
+                raise ValueError(f"Question {qid} (at byte {pos_bytes + byte_length(pos, start)}) "
+                                 f"is not valid JSON: {e.msg}") from e
+            if (end == len(text) or text[end] not in _AFTER_VALUE) and read_more():
+                # A bare number cut off by the chunk ("3." of "3.25") still parses
+                continue
+
+            byte_start = pos_bytes + byte_length(pos, start)
+            length = byte_length(start, end)
+            pos, pos_bytes = end, byte_start + length
+
+            yield qid, question, byte_start, length
+            qid += 1
+
+
+class QuestionBank:
+    """
+    What every question bank format shares: question IDs grouped by tier,
+    and drawing a game from them. Subclasses provide get(qid).
+    """
+    def __init__(self, tier_ids, rng=None):
+        self.tier_ids = tier_ids  # [sequence of question IDs] per tier
+        self.decks = [QuestionDeck(len(ids)) for ids in tier_ids]
+        self.rng = rng or random.Random()
+        self.lock = threading.Lock()
+
+    def tier_sizes(self):
+        return [len(ids) for ids in self.tier_ids]
+
+    def draw_game(self):
+        """
+        Picks one question ID per tier, in tier order, without repeating a
+        question until its tier has been used up. Stops at the first empty
+        tier, so a short bank gives a short game.
+        """
+        game = []
+        with self.lock:
+            for ids, deck in zip(self.tier_ids, self.decks):
+                if not ids:
+                    break
+                game.append(ids[deck.draw(self.rng)])
+        return game
+
+    def close(self):
+        pass
+
+
+class QuestionStore(QuestionBank):
+    """
+    A questions.json bank indexed by money-tree tier. Only the index stays
+    resident: the byte offset and length of every question, and each
+    tier's question IDs (an ID is the question's position in the file).
+    A question is parsed from the file when it is asked for.
+
+    The index is saved next to the bank (questions.json.idx) and reused
+    while the bank's size and modification time are unchanged.
+    """
+    def __init__(self, path, offsets, lengths, tier_ids, rng=None):
+        super().__init__(tier_ids, rng)
+        self.path = path
+        self.offsets = offsets    # array('Q'), by question ID
+        self.lengths = lengths    # array('I'), by question ID
+        self.file = open(path, 'rb')
+
+    @classmethod
+    def open(cls, path="questions.json", use_saved_index=True):
+        """Opens a bank, building its index if there is no up-to-date saved one."""
+        stat = os.stat(path)
+        index_path = path + ".idx"
+        if use_saved_index:
+            saved = cls.read_index(index_path, stat)
+            if saved:
+                return cls(path, *saved)
+
+        offsets, lengths, tier_ids = cls.build_index(path)
+        if use_saved_index:
+            try:
+                cls.write_index(index_path, stat, offsets, lengths, tier_ids)
+            except OSError as e:
+                # A read-only install just rebuilds the index each time
+                print(f"Could not save question index: {e}")
+        return cls(path, offsets, lengths, tier_ids)
+
+    @staticmethod
+    def build_index(path):
+        """Scans the bank once. Raises ValueError if it isn't a JSON list of questions."""
+        offsets = array.array('Q')
+        lengths = array.array('I')
+        tier_ids = [array.array('I') for _ in range(TIERS)]
+        for qid, question, offset, length in iter_questions(path):
+            if not isinstance(question, dict):
+                raise ValueError(f"Question {qid} is not an object")
+            offsets.append(offset)
+            lengths.append(length)
+            tier_ids[question_tier(question, qid) - 1].append(qid)
+        return offsets, lengths, tier_ids
+
+    @staticmethod
+    def write_index(index_path, stat, offsets, lengths, tier_ids):
+        temp = index_path + ".tmp"
+        with open(temp, 'wb') as f:
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, TIERS, len(offsets), stat.st_size, stat.st_mtime_ns))
+            f.write(array.array('I', [len(ids) for ids in tier_ids]).tobytes())
+            f.write(offsets.tobytes())
+            f.write(lengths.tobytes())
+            for ids in tier_ids:
+                f.write(ids.tobytes())
+        os.replace(temp, index_path)
+
+    @staticmethod
+    def read_index(index_path, stat):
+        """Returns (offsets, lengths, tier_ids), or None if missing or stale."""
+        try:
+            with open(index_path, 'rb') as f:
+                data = f.read()
+            magic, version, tiers, count, size, mtime = INDEX_HEADER.unpack_from(data)
+        except (OSError, struct.error):
+            return None
+        if (magic, version, tiers, size, mtime) != (INDEX_MAGIC, INDEX_VERSION, TIERS, stat.st_size, stat.st_mtime_ns):
+            return None
+
+        pos = INDEX_HEADER.size
+        def take(typecode, n):
+            nonlocal pos
+            values = array.array(typecode)
+            end = pos + n * values.itemsize
+            if end > len(data):
+                raise ValueError("Truncated index")
+            values.frombytes(data[pos:end])
+            pos = end
+            return values
+        try:
+            tier_sizes = take('I', TIERS)
+            offsets = take('Q', count)
+            lengths = take('I', count)
+            tier_ids = [take('I', n) for n in tier_sizes]
+        except ValueError:
+            return None
+        return offsets, lengths, tier_ids
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def get(self, qid):
+        """Reads and parses one question."""
+        with self.lock:
+            self.file.seek(self.offsets[qid])
+            raw = self.file.read(self.lengths[qid])
+        return json.loads(raw)
+
+    def close(self):
+        self.file.close()
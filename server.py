@@ -2,14 +2,15 @@
 
 import socket
 from _thread import *
-import pickle
-from player import Player
+import protocol
+from game_room import GameRoom, RoomChannel
+import queue
 import sys
 import threading
-import urllib.request
-import json
 import time
-from settings import LOBBY_SPY_URL as DEFAULT_SPY_URL
+from heartbeat import HeartbeatClient, UdpHeartbeatClient
+from question_pack import reload_on_sighup
+from settings import LOBBY_SPY_URL as DEFAULT_SPY_URL, LOBBY_SPY_UDP_PORT
 
 # Default Configuration
 server_port = 50550
@@ -17,112 +18,143 @@ lobby_name = "My Lobby"
 host_name = "Host" 
 is_public = False
 spy_url = DEFAULT_SPY_URL
+use_async = False
+use_udp_heartbeat = False
 
 # Parse Command Line Arguments
-# Expected: script.py [port] [lobby_name] [host_name] [public] [spy_url]
-if len(sys.argv) > 1:
-    try: server_port = int(sys.argv[1])
+# Expected: script.py [port] [lobby_name] [host_name] [public] [spy_url] [--async] [--udp-heartbeat]
+args = [arg for arg in sys.argv[1:] if not arg.startswith("--")]
+if len(args) > 0:
+    try: server_port = int(args[0])
     except ValueError: pass
-if len(sys.argv) > 2: lobby_name = sys.argv[2]
-if len(sys.argv) > 3: host_name = sys.argv[3]
-if len(sys.argv) > 4: is_public = (sys.argv[4] == "1" or sys.argv[4].lower() == "true")
-if len(sys.argv) > 5: spy_url = sys.argv[5]
+if len(args) > 1: lobby_name = args[1]
+if len(args) > 2: host_name = args[2]
+if len(args) > 3: is_public = (args[3] == "1" or args[3].lower() == "true")
+if len(args) > 4: spy_url = args[4]
+if "--async" in sys.argv: use_async = True
+if "--udp-heartbeat" in sys.argv: use_udp_heartbeat = True
 
-print(f"Server Config: Port={server_port}, Name='{lobby_name}', Host='{host_name}', Public={is_public}, SpyURL='{spy_url}'")
+print(f"Server Config: Port={server_port}, Name='{lobby_name}', Host='{host_name}', Public={is_public}, SpyURL='{spy_url}', Async={use_async}, UDPHeartbeat={use_udp_heartbeat}")
 
-s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-try:
-    s.bind(("", server_port))
-except socket.error as e:
-    print(f"Bind Error: {e}")
-    exit()
-
-s.listen(4)
-print("Waiting for connections...")
+# Frames a connection may have waiting to be sent before it is dropped
+OUTBOX_FRAMES = 256
 
 # Game State
 game_state_lock = threading.Lock()
-game_state = {
-    "players": [],
-    "game_started": False,
-    "lobby_name": lobby_name,
-    "host_name": host_name
-}
+room = GameRoom(lobby_name, host_name)
+
+class Outbox:
+    """
+    A connection's outgoing frames, sent by a thread of its own. Putting a
+    frame never blocks, so a client that stops reading only stalls itself
+    rather than everyone sending to it under game_state_lock; once
+    OUTBOX_FRAMES are waiting, it is disconnected.
+    """
+    def __init__(self, conn):
+        self.conn = conn
+        self.frames = queue.Queue(OUTBOX_FRAMES)
+        self.closed = False
+        threading.Thread(target=self._writer_loop, daemon=True).start()
+
+    def put(self, data):
+        """Queues a frame. Returns False (and disconnects) if the connection has fallen behind or closed."""
+        if self.closed:
+            return False
+        try:
+            self.frames.put_nowait(data)
+            return True
+        except queue.Full:
+            print("Dropping a connection that stopped reading.")
+            self.close()
+            return False
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        # Wakes a writer blocked in sendall, and the connection's reader
+        try: self.conn.shutdown(socket.SHUT_RDWR)
+        except OSError: pass
+        try: self.frames.put_nowait(None)
+        except queue.Full: pass
+
+    def _writer_loop(self):
+        while True:
+            data = self.frames.get()
+            if data is None or self.closed:
+                break
+            try:
+                self.conn.sendall(data)
+            except OSError:
+                self.close()
+                break
+
+class ThreadedRoomChannel(RoomChannel):
+    """The room's connections (each an Outbox), each read by its own thread."""
+    def send(self, outbox, data):
+        if not outbox.put(data):
+            self.subscribers.discard(outbox)
 
-id_counter = 1
-id_lock = threading.Lock()
+    def call_later(self, seconds, callback):
+        timer = threading.Timer(seconds, callback)
+        timer.daemon = True
+        timer.start()
+
+channel = ThreadedRoomChannel(room, game_state_lock)
 
 def register_lobby():
+    # The UDP listener is optional on the spy side, so servers opt in to it
+    if use_udp_heartbeat:
+        heartbeat = UdpHeartbeatClient(spy_url, LOBBY_SPY_UDP_PORT)
+    else:
+        heartbeat = HeartbeatClient(spy_url)
     while True:
         if is_public:
-            try:
-                data = {
-                    "name": lobby_name,
-                    "host": host_name,
-                    "port": server_port,
-                    "players": len(game_state["players"]),
-                    "max_players": 4
-                }
-                json_data = json.dumps(data).encode('utf-8')
-                req = urllib.request.Request(spy_url, data=json_data, headers={'Content-Type': 'application/json'})
-                with urllib.request.urlopen(req) as response: pass 
-            except Exception as e: print(f"Lobby Spy Error: {e}")
+            data = {
+                "name": lobby_name,
+                "host": host_name,
+                "port": server_port,
+                "players": len(room.players),
+                "max_players": 4
+            }
+            heartbeat.beat(data)
         time.sleep(30)
 
 if is_public: start_new_thread(register_lobby, ())
 
 def threaded_client(conn):
-    global id_counter, game_state
-    
     # --- HANDSHAKE: Receive Name ---
     try:
-        name_data = conn.recv(4096)
-        if not name_data:
-            conn.close()
-            return
-        player_name = pickle.loads(name_data)
+        # This server hosts a single lobby, so any lobby ID is ignored
+        player_name, _, _ = protocol.parse_hello(protocol.recv_message(conn))
+    except EOFError:
+        conn.close()
+        return
     except Exception as e:
         print(f"Handshake error: {e}")
         conn.close()
         return
 
     # --- HANDSHAKE: Assign ID ---
-    player_id = -1
-    
-    if player_name == host_name:
-        print(f"Host '{player_name}' identified. Assigning ID 0.")
-        player_id = 0
-        with game_state_lock:
-            # Remove any ghost hosts
-            game_state["players"] = [p for p in game_state["players"] if p.id != 0]
-    else:
-        with id_lock:
-            player_id = id_counter
-            id_counter += 1
-        print(f"Player '{player_name}' connected. Assigned ID {player_id}.")
-
-    player_object = Player(player_id)
-    player_object.name = player_name
-    
     with game_state_lock:
-        game_state["players"].append(player_object)
+        player_object = channel.join(player_name)
+    player_id = player_object.id
 
-    conn.send(pickle.dumps(player_object))
+    # From here on everything sent to this client goes through its outbox
+    outbox = Outbox(conn)
+    outbox.put(protocol.pack(player_object))
 
     # Main Loop
     while True:
         try:
-            data = conn.recv(2048)
-            if not data: break
-            command = pickle.loads(data)
-
+            command = protocol.recv_message(conn)
+            # Stamped before anything else, so no wait for the lock can slow an answer down
+            arrived_ns = time.monotonic_ns()
+            if channel.handle_timed(outbox, player_id, command, arrived_ns):
+                continue
             with game_state_lock:
-                if command == "start" and player_id == 0:
-                    game_state["game_started"] = True
-                reply = game_state
-            
-            conn.sendall(pickle.dumps(reply))
-        except (pickle.UnpicklingError, ConnectionResetError, EOFError):
+                channel.handle(outbox, player_id, command)
+        except (protocol.ProtocolError, OSError, EOFError):
             break
         except Exception as e:
             print(f"Error: {e}")
@@ -130,12 +162,30 @@ def threaded_client(conn):
 
     print(f"Player {player_id} ({player_name}) disconnected.")
     with game_state_lock:
-        game_state["players"] = [p for p in game_state["players"] if p.id != player_id]
-        if player_id == 0:
-            print("Host disconnected. Resetting state.")
-            game_state["game_started"] = False
+        channel.leave(outbox, player_id)
+    outbox.close()
     conn.close()
 
-while True:
-    conn, addr = s.accept()
-    start_new_thread(threaded_client, (conn, ))
\ No newline at end of file
+def run_threaded():
+    s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    try:
+        s.bind(("", server_port))
+    except socket.error as e:
+        print(f"Bind Error: {e}")
+        exit()
+
+    s.listen(4)
+    print("Waiting for connections...")
+
+    while True:
+        conn, addr = s.accept()
+        start_new_thread(threaded_client, (conn, ))
+
+# Rooms keep the bank their game started with; `kill -HUP` loads a new one for the next game
+reload_on_sighup('questions.json')
+
+if use_async:
+    import async_server
+    async_server.run(room, server_port)
+else:
+    run_threaded()
@@ -23,8 +23,26 @@ BASE_FONT_SMALL = 36
 BASE_FONT_HUGE = 100 
 
 FPS = 60
+# Frame rate once nothing has happened for IDLE_AFTER_SECONDS
+IDLE_FPS = 10
+IDLE_AFTER_SECONDS = 2.0
 SERVER_PORT = 50550
-LOBBY_SPY_URL = "http://lobbies.seedy.cc:1945/lobbies"
+# The spy service's HTTP port (spy_service.py serves on it too)
+LOBBY_SPY_PORT = 1945
+LOBBY_SPY_URL = f"http://lobbies.seedy.cc:{LOBBY_SPY_PORT}/lobbies"
+LOBBY_PAGE_SIZE = 20
+# UDP port of the spy service's optional compact heartbeat listener
+LOBBY_SPY_UDP_PORT = 1945
+
+# Length of the Phone-a-Friend call once the friend picks up
+PHONE_CLOCK_SECONDS = 30
+
+# How long the server waits for everyone to lock in before revealing anyway,
+# long enough for a Phone-a-Friend call to ring and run its clock down
+ANSWER_SECONDS = 90
+
+# Time to answer a Fastest Finger First question (the length of its music)
+FASTEST_FINGER_SECONDS = 20
 
 MONEY_TREE_GBP = [
     "£100", "£200", "£300", "£500", "£1,000",
@@ -39,6 +57,9 @@ MONEY_TREE_USD = [
 ]
 
 # --- SOUND CONFIGURATION ---
+# Most decoded sound data to keep in memory (stings in use are always kept)
+SOUND_CACHE_BUDGET_MB = 48
+
 SOUND_FILES = {
     # --- Background Music (Question Beds) ---
     "q_bed_1_5": "026 $100-$1000 Questions.flac",
@@ -57,6 +78,7 @@ SOUND_FILES = {
     "theme": "theme.mp3",
     "walk_away": "walk_away.mp3",
     "lifeline": "lifeline.wav",
+    "fastest_finger": "009 Read Fastest Finger Question.flac",
 
     # --- PHONE A FRIEND ---
     "paf_call": "041 Phone a Friend - Call.flac",
@@ -2,9 +2,107 @@
 
 import pygame
 import os
-from settings import SOUND_FILES
+import queue
+import threading
+from collections import OrderedDict
+from settings import SOUND_FILES, SOUND_CACHE_BUDGET_MB
+from sound_pack import SoundPack, PACK_FILE
+
+# Long looping tracks, streamed from disk by pygame.mixer.music rather than
+# decoded into memory. Everything else is a short sting.
+MUSIC_KEYS = {"theme", "fastest_finger"} | {key for key in SOUND_FILES if key.startswith("q_bed_")}
+
+class SoundCache:
+    """
+    Decoded stings keyed by their resolved file path, so keys that share a
+    file (win_0 to win_3, lose_0 to lose_4) share one buffer. Once the
+    decoded size goes over budget, the least recently used sounds that
+    aren't pinned are dropped. Safe to use from the prefetch thread.
+    """
+    def __init__(self, budget_bytes):
+        self.budget = budget_bytes
+        self.sounds = OrderedDict()  # { path: Sound }, least recently used first
+        self.sizes = {}              # { path: decoded bytes }
+        self.pinned = set()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_resident = 0
+        self.lock = threading.RLock()
+
+    @staticmethod
+    def sound_bytes(sound):
+        """Decoded size of a sound in the mixer's format (without copying it)."""
+        frequency, size, channels = pygame.mixer.get_init()
+        return int(sound.get_length() * frequency) * channels * (abs(size) // 8)
+
+    def __contains__(self, path):
+        return path in self.sounds
+
+    def get(self, path, load=None):
+        """
+        Returns the Sound for path, calling load() (or decoding the file)
+        on a miss. Raises if it can't be loaded.
+        """
+        with self.lock:
+            sound = self.sounds.get(path)
+            if sound is not None:
+                self.hits += 1
+                self.sounds.move_to_end(path)
+                return sound
+            self.misses += 1
+        return self.add(path, load() if load else pygame.mixer.Sound(path))
+
+    def add(self, path, sound):
+        """Stores a sound decoded elsewhere. Returns the cached one if it got there first."""
+        with self.lock:
+            if path in self.sounds:
+                return self.sounds[path]
+            self.sounds[path] = sound
+            self.sizes[path] = self.sound_bytes(sound)
+            self.bytes_resident += self.sizes[path]
+            self.evict()
+            return sound
+
+    def pin(self, paths):
+        """Replaces the pinned set. Pinned sounds are never evicted."""
+        with self.lock:
+            self.pinned = set(paths)
+            self.evict()
+
+    def evict(self):
+        # A playing sound keeps its channel's reference, so dropping it is safe
+        for path in list(self.sounds):
+            if self.bytes_resident <= self.budget:
+                break
+            # Never evict what was just asked for
+            if path in self.pinned or path == next(reversed(self.sounds)):
+                continue
+            del self.sounds[path]
+            self.bytes_resident -= self.sizes.pop(path)
+            self.evictions += 1
+
+    def summary(self):
+        return (f"Sound cache: {len(self.sounds)} sounds, {self.bytes_resident / 1048576:.1f} of "
+                f"{self.budget / 1048576:.0f} megabytes, {self.hits} hits, {self.misses} misses, "
+                f"{self.evictions} evictions.")
+
 
 class SoundManager:
+    """
+    Plays the game's sounds without decoding them all up front.
+    Music beds stream through pygame.mixer.music (one at a time), and
+    stings are decoded the first time they are played or measured, then
+    kept in a SoundCache.
+
+    prefetch() decodes stings (and reads music files into the OS cache) on
+    a background thread ahead of when they're needed; is_ready() tells
+    whether that finished in time.
+
+    If sounds/sounds.pack has been built (see sound_pack.py), sounds are
+    read from it instead: already in the mixer's format, so nothing is
+    decoded or resampled. Files newer than the pack are still used directly.
+    """
     def __init__(self):
         # Frequency, size, channels, buffer
         try:
@@ -14,54 +112,170 @@ class SoundManager:
             print(f"Sound Error: {e}")
             self.enabled = False
 
-        self.sounds = {}
-        self.music_channel = None
+        self.sound_dir = "sounds"
+        self.paths = {}    # { key: path } for every sound file that exists
+        self.pack = None
+        self.packed = set()  # keys served from the pack
+        self.music_file = None
+        self.cache = SoundCache(SOUND_CACHE_BUDGET_MB * 1024 * 1024)
+        self.current_music = None
+        # Music files already read once, so streaming them won't wait on the disk
+        self.warmed = set()
+        self.prefetch_queue = queue.Queue()
+        self.prefetch_thread = None
         self.load_sounds()
 
     def load_sounds(self):
+        """Finds the sound files. Nothing is decoded until it is needed."""
         if not self.enabled: return
-        
-        sound_dir = "sounds"
-        if not os.path.exists(sound_dir):
+
+        if not os.path.exists(self.sound_dir):
             try:
-                os.makedirs(sound_dir)
+                os.makedirs(self.sound_dir)
             except: pass
             return
 
+        self.pack = self.open_pack()
         for key, filename in SOUND_FILES.items():
-            path = os.path.join(sound_dir, filename)
-            if os.path.exists(path):
-                try:
-                    self.sounds[key] = pygame.mixer.Sound(path)
-                except Exception as e:
-                    print(f"Could not load {filename}: {e}")
+            path = os.path.join(self.sound_dir, filename)
+            if self.pack and self.pack.has(filename, path):
+                # The source file may not even be shipped
+                self.paths[key] = path
+                self.packed.add(key)
+            elif os.path.exists(path):
+                self.paths[key] = path
             else:
                 print(f"Missing sound file: {path}")
 
+    def open_pack(self):
+        path = os.path.join(self.sound_dir, PACK_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            pack = SoundPack(path)
+        except Exception as e:
+            print(f"Could not open {path}: {e}")
+            return None
+        if pack.format != pygame.mixer.get_init():
+            print(f"Ignoring {path}: built for {pack.format}, mixer is {pygame.mixer.get_init()}")
+            return None
+        return pack
+
+    def decode(self, key):
+        if key in self.packed:
+            return pygame.mixer.Sound(buffer=self.pack.pcm(SOUND_FILES[key]))
+        return pygame.mixer.Sound(self.paths[key])
+
+    def open_music(self, key):
+        """Returns what pygame.mixer.music.load should be given for key."""
+        if key in self.packed:
+            return self.pack.open(SOUND_FILES[key])
+        return self.paths[key]
+
+    def get_sound(self, key):
+        """Returns the decoded sting for key, loading it on first use."""
+        if not self.enabled or key not in self.paths:
+            return None
+        try:
+            return self.cache.get(self.paths[key], lambda: self.decode(key))
+        except Exception as e:
+            print(f"Could not load {SOUND_FILES[key]}: {e}")
+            # Don't retry a broken file every time it is asked for
+            del self.paths[key]
+            return None
+
+    def prefetch(self, keys):
+        """
+        Loads these sounds on the background thread and keeps them pinned,
+        releasing whatever was pinned before. Returns immediately.
+        """
+        if not self.enabled: return
+        keys = [key for key in keys if key in self.paths]
+        self.cache.pin([self.paths[key] for key in keys if key not in MUSIC_KEYS])
+        if self.prefetch_thread is None:
+            self.prefetch_thread = threading.Thread(target=self._prefetch_loop, daemon=True)
+            self.prefetch_thread.start()
+        self.prefetch_queue.put(keys)
+
+    def _prefetch_loop(self):
+        while True:
+            for key in self.prefetch_queue.get():
+                path = self.paths.get(key)
+                if path is None or path in self.warmed or path in self.cache:
+                    continue
+                try:
+                    if key in MUSIC_KEYS:
+                        music = self.open_music(key)
+                        with (music if key in self.packed else open(music, 'rb')) as f:
+                            while f.read(1 << 20): pass
+                        self.warmed.add(path)
+                    else:
+                        self.cache.add(path, self.decode(key))
+                except Exception as e:
+                    print(f"Could not prefetch {SOUND_FILES[key]}: {e}")
+
+    def is_ready(self, key):
+        """True if playing key now won't have to wait for the disk or a decode."""
+        path = self.paths.get(key)
+        if path is None:
+            return True
+        return path in self.warmed if key in MUSIC_KEYS else path in self.cache
+
     def play(self, key, loops=0):
         if not self.enabled: return
-        if key in self.sounds:
-            self.sounds[key].play(loops=loops)
+        sound = self.get_sound(key)
+        if sound:
+            sound.play(loops=loops)
 
     def play_music(self, key, loops=-1):
         if not self.enabled: return
-        if self.music_channel:
-            self.music_channel.stop()
+        self.stop_music()
 
-        if key in self.sounds:
-            self.music_channel = self.sounds[key].play(loops=loops)
+        if key not in self.paths:
+            return
+        if key not in MUSIC_KEYS:
+            # A sting used as music still plays, it just isn't streamed
+            sound = self.get_sound(key)
+            if sound:
+                self.current_music = sound.play(loops=loops)
+            return
+
+        try:
+            # Keep the packed file object alive while the mixer streams it
+            self.music_file = self.open_music(key)
+            if key in self.packed:
+                pygame.mixer.music.load(self.music_file, "wav")
+            else:
+                pygame.mixer.music.load(self.music_file)
+            pygame.mixer.music.play(loops=loops)
+            self.current_music = key
+        except Exception as e:
+            print(f"Could not stream {SOUND_FILES[key]}: {e}")
 
     def stop_music(self):
-        if self.music_channel:
-            self.music_channel.stop()
-            self.music_channel = None
+        if not self.enabled: return
+        if isinstance(self.current_music, pygame.mixer.Channel):
+            self.current_music.stop()
+        elif self.current_music:
+            pygame.mixer.music.stop()
+        self.current_music = None
 
     def stop_all(self):
         if self.enabled:
             pygame.mixer.stop()
+            self.stop_music()
 
     def get_length(self, key):
-        """Returns the length of the sound in seconds. Returns 0 if not found."""
-        if self.enabled and key in self.sounds:
-            return self.sounds[key].get_length()
-        return 0
\ No newline at end of file
+        """
+        Returns the length of the sound in seconds. Returns 0 if not found,
+        or for streamed music, whose length isn't known without decoding it
+        (unless it comes from the pack).
+        """
+        if not self.enabled: return 0
+        if key in MUSIC_KEYS:
+            if key not in self.packed:
+                return 0
+            frequency, size, channels = self.pack.format
+            return len(self.pack.pcm(SOUND_FILES[key])) / (frequency * channels * (abs(size) // 8))
+        sound = self.get_sound(key)
+        return sound.get_length() if sound else 0
@@ -0,0 +1,164 @@
+# sound_pack.py
+#
+# Builds and reads sounds/sounds.pack: every file in settings.SOUND_FILES,
+# decoded once and stored as WAV in the mixer's own format (44100 Hz,
+# signed 16-bit, stereo), so the game never has to decode or resample
+# FLAC/MP3 at run time.
+#
+# Build (run from the repository root, after changing any sound):
+#     python sound_pack.py
+#
+# Layout (little-endian):
+#     header   magic, frequency, sample size, channels, entry count
+#     index    per entry: name length, UTF-8 file name, source mtime (ns),
+#              WAV offset, WAV length, PCM offset, PCM length
+#     data     the WAV files, each starting on a 16-byte boundary
+
+import io
+import mmap
+import os
+import struct
+import sys
+import wave
+
+MAGIC = b"SNDPACK1"
+HEADER = struct.Struct("<8sIhBI")
+ENTRY = struct.Struct("<qQQQQ")
+NAME_LENGTH = struct.Struct("<H")
+ALIGN = 16
+
+PACK_FILE = "sounds.pack"
+MIXER_FORMAT = (44100, -16, 2)
+
+class PackedFile(io.RawIOBase):
+    """Read-only file object over one entry of the mapped pack, for pygame.mixer.music."""
+    def __init__(self, view):
+        self.view = view
+        self.pos = 0
+
+    def readable(self): return True
+    def seekable(self): return True
+    def tell(self): return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR: offset += self.pos
+        elif whence == io.SEEK_END: offset += len(self.view)
+        self.pos = max(0, min(offset, len(self.view)))
+        return self.pos
+
+    def readinto(self, buffer):
+        count = min(len(buffer), len(self.view) - self.pos)
+        buffer[:count] = self.view[self.pos:self.pos + count]
+        self.pos += count
+        return count
+
+
+class SoundPack:
+    """
+    A memory-mapped sounds.pack. Entries are looked up by the file name
+    used in SOUND_FILES. Pages are only read in from disk as sounds are
+    used, and stay shared with the OS file cache rather than private memory.
+    """
+    def __init__(self, path):
+        self.file = open(path, 'rb')
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, frequency, size, channels, count = HEADER.unpack_from(self.map)
+            if magic != MAGIC:
+                raise ValueError("not a sound pack")
+            self.format = (frequency, size, channels)
+
+            self.entries = {}  # { file name: (mtime_ns, wav_offset, wav_length, pcm_offset, pcm_length) }
+            pos = HEADER.size
+            for _ in range(count):
+                (length,) = NAME_LENGTH.unpack_from(self.map, pos)
+                pos += NAME_LENGTH.size
+                name = self.map[pos:pos + length].decode('utf-8')
+                pos += length
+                self.entries[name] = ENTRY.unpack_from(self.map, pos)
+                pos += ENTRY.size
+        except Exception:
+            self.file.close()
+            raise
+        self.view = memoryview(self.map)
+
+    def has(self, name, source_path=None):
+        """True if the pack holds name, and it isn't older than the source file (if present)."""
+        entry = self.entries.get(name)
+        if entry is None:
+            return False
+        if source_path and os.path.exists(source_path):
+            return os.stat(source_path).st_mtime_ns == entry[0]
+        return True
+
+    def pcm(self, name):
+        """Zero-copy view of an entry's raw samples."""
+        _, _, _, offset, length = self.entries[name]
+        return self.view[offset:offset + length]
+
+    def open(self, name):
+        """File object over an entry's WAV data, for streaming."""
+        _, offset, length, _, _ = self.entries[name]
+        return PackedFile(self.view[offset:offset + length])
+
+
+def to_wav(pcm, frequency, size, channels):
+    buffer = io.BytesIO()
+    with wave.open(buffer, 'wb') as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(abs(size) // 8)
+        wav.setframerate(frequency)
+        wav.writeframes(pcm)
+    data = buffer.getvalue()
+    # wave always writes the canonical 44-byte header
+    return data, len(data) - len(pcm)
+
+def build(sound_dir="sounds", output=None):
+    """Decodes every file in SOUND_FILES and writes the pack. Returns the number packed."""
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    import pygame
+    from settings import SOUND_FILES
+
+    frequency, size, channels = MIXER_FORMAT
+    pygame.mixer.init(frequency, size, channels)
+    if pygame.mixer.get_init() != MIXER_FORMAT:
+        raise RuntimeError(f"Mixer opened as {pygame.mixer.get_init()}, not {MIXER_FORMAT}")
+
+    blobs = []
+    for name in sorted(set(SOUND_FILES.values())):
+        path = os.path.join(sound_dir, name)
+        if not os.path.exists(path):
+            print(f"Skipping missing sound file: {path}")
+            continue
+        # The mixer decodes and resamples to its own format
+        pcm = pygame.mixer.Sound(path).get_raw()
+        wav, header_length = to_wav(pcm, frequency, size, channels)
+        blobs.append((name, os.stat(path).st_mtime_ns, wav, header_length, len(pcm)))
+        print(f"Packed {name}: {len(pcm) / 1048576:.1f} MB")
+
+    index_length = HEADER.size + sum(NAME_LENGTH.size + len(name.encode('utf-8')) + ENTRY.size
+                                     for name, *_ in blobs)
+    output = output or os.path.join(sound_dir, PACK_FILE)
+    temp = output + ".tmp"
+    with open(temp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, frequency, size, channels, len(blobs)))
+        offset = index_length
+        layout = []
+        for name, mtime, wav, header_length, pcm_length in blobs:
+            offset += -offset % ALIGN
+            layout.append(offset)
+            raw_name = name.encode('utf-8')
+            f.write(NAME_LENGTH.pack(len(raw_name)) + raw_name)
+            f.write(ENTRY.pack(mtime, offset, len(wav), offset + header_length, pcm_length))
+            offset += len(wav)
+        for (_, _, wav, _, _), start in zip(blobs, layout):
+            f.write(b"\0" * (start - f.tell()))
+            f.write(wav)
+    # Never leave a half-written pack where the game will look for it
+    os.replace(temp, output)
+    print(f"Wrote {output}: {len(blobs)} sounds, {os.path.getsize(output) / 1048576:.1f} MB")
+    return len(blobs)
+
+if __name__ == '__main__':
+    # python sound_pack.py [sound_dir] [output]
+    build(*sys.argv[1:3])
@@ -1,20 +1,34 @@
 # spy_service.py
 
-from flask import Flask, request, jsonify
+import socket
+import sys
+import threading
+from flask import Flask, request, jsonify, Response
 from waitress import serve # Import the production server
-import time
+from lobby_store import LobbyStore, SORT_ORDERS
+from heartbeat import unpack_udp_heartbeat, UDP_FULL, UDP_NACK
+from settings import LOBBY_SPY_PORT as HTTP_PORT, LOBBY_SPY_UDP_PORT as UDP_PORT
 
 app = Flask(__name__)
 
-# Store lobbies in memory: { "unique_id": { lobby_data } }
-lobbies = {}
-
 # Time in seconds before a lobby is considered dead
 TIMEOUT_SECONDS = 40 
 
+# Largest page a client may ask for with ?limit=
+MAX_PAGE_SIZE = 100
+
+# Any of these switches GET /lobbies from the plain list to a paged result
+QUERY_PARAMS = ("open", "prefix", "sort", "limit", "cursor")
+
+# Kernel receive buffer for the UDP listener, to ride out bursts
+UDP_RECV_BUFFER = 4 * 1024 * 1024
+
+# Store lobbies in memory, ordered by expiry: { "ip:port": { lobby_data } }
+lobbies = LobbyStore(TIMEOUT_SECONDS)
+
 @app.route('/')
 def home():
-    return "Lobby Spy Service is Running on Port 1945."
+    return f"Lobby Spy Service is Running on Port {HTTP_PORT}."
 
 @app.route('/lobbies', methods=['POST'])
 def register_lobby():
@@ -33,12 +47,11 @@ def register_lobby():
         # Create a unique key for this lobby
         lobby_key = f"{client_ip}:{data['port']}"
 
-        # Add the IP and a timestamp to the data
+        # Add the IP to the data (the store tracks when it was last seen)
         data['ip'] = client_ip
-        data['last_seen'] = time.time()
 
         # Update the store
-        lobbies[lobby_key] = data
+        lobbies.register(lobby_key, data)
         
         print(f"Heartbeat from {data['name']} ({lobby_key})")
         return "Registered", 200
@@ -46,36 +59,136 @@ def register_lobby():
         print(f"Error: {e}")
         return "Error", 500
 
+@app.route('/lobbies/<int:port>/ping', methods=['POST'])
+def ping_lobby(port):
+    """
+    Lightweight heartbeat for a lobby whose details haven't changed.
+    Answers 404 if the lobby is unknown, so the game server re-registers.
+    """
+    lobby_key = f"{request.remote_addr}:{port}"
+    if lobbies.touch(lobby_key):
+        return "OK", 200
+    return "Unknown Lobby", 404
+
 @app.route('/lobbies', methods=['GET'])
 def get_lobbies():
     """
     Game clients call this to get the list of playable lobbies.
-    This also cleans up dead lobbies.
+    Expired lobbies are normally removed by the background sweeper; this
+    only pops any that expired since, which costs nothing when there are none.
+    Supports If-None-Match (answered with 304) and gzip transfer.
+
+    Without query parameters the full list is returned, as before. With any
+    of them, the result is a page: {"lobbies": [...], "next_cursor": ..., "total": N}
+      open=1        only lobbies that are not full
+      prefix=...    lobby names starting with this text (case-insensitive)
+      sort=...      name (default), players (fullest first) or age (oldest first)
+      limit=N       page size (default and maximum 100)
+      cursor=...    next_cursor from the previous page
     """
-    current_time = time.time()
-    active_lobbies = []
-    dead_lobbies = []
-
-    # Filter lobbies
-    for key, lobby in lobbies.items():
-        if current_time - lobby['last_seen'] < TIMEOUT_SECONDS:
-            # This lobby is active
-            clean_lobby = lobby.copy()
-            del clean_lobby['last_seen']
-            active_lobbies.append(clean_lobby)
-        else:
-            # This lobby has timed out
-            dead_lobbies.append(key)
-
-    # Remove dead lobbies from memory
-    for key in dead_lobbies:
+    for key in lobbies.prune():
         print(f"Pruning inactive lobby: {key}")
-        del lobbies[key]
 
-    return jsonify(active_lobbies)
+    if any(param in request.args for param in QUERY_PARAMS):
+        return query_lobbies()
+
+    compressed = request.accept_encodings['gzip'] > 0
+    etag, body = lobbies.get_snapshot(compressed)
+
+    # The client already has this exact list
+    if etag in request.if_none_match:
+        return not_modified(etag)
+
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    response.vary.add('Accept-Encoding')
+    if compressed:
+        response.headers['Content-Encoding'] = 'gzip'
+    return response
+
+def query_lobbies():
+    args = request.args
+    sort = args.get('sort', 'name')
+    if sort not in SORT_ORDERS:
+        return "Invalid sort", 400
+    try:
+        limit = min(int(args.get('limit', MAX_PAGE_SIZE)), MAX_PAGE_SIZE)
+        if limit < 1:
+            raise ValueError(limit)
+        open_only = args.get('open', '0').lower() in ('1', 'true')
+        etag, page, next_cursor, total = lobbies.query(
+            open_only, args.get('prefix', ''), sort, args.get('cursor'), limit)
+    except ValueError:
+        return "Invalid limit or cursor", 400
+
+    # Same URL and same lobby list version means the same page
+    if etag in request.if_none_match:
+        return not_modified(etag)
+
+    response = jsonify({
+        "lobbies": page,
+        "next_cursor": next_cursor,
+        "total": total
+    })
+    response.set_etag(etag)
+    return response
+
+def not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+def handle_udp_heartbeat(packet, addr):
+    """
+    Applies one heartbeat packet to the registry, exactly as the POST and
+    ping routes would. Returns a reply to send back, or None.
+    """
+    try:
+        kind, data = unpack_udp_heartbeat(packet)
+    except ValueError:
+        return None
+
+    lobby_key = f"{addr[0]}:{data['port']}"
+    if kind == UDP_FULL:
+        data['ip'] = addr[0]
+        lobbies.register(lobby_key, data)
+        return None
+    # Unknown lobby: ask the game server for a full heartbeat
+    if not lobbies.touch(lobby_key):
+        return UDP_NACK
+    return None
+
+def start_udp_listener(port=UDP_PORT, host='0.0.0.0'):
+    """
+    Receives compact heartbeats on a background thread. Unlike the HTTP
+    routes, nothing is logged per heartbeat, so the loop stays cheap.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, UDP_RECV_BUFFER)
+    except OSError:
+        pass
+    sock.bind((host, port))
+
+    def listen():
+        while True:
+            try:
+                packet, addr = sock.recvfrom(512)
+                reply = handle_udp_heartbeat(packet, addr)
+                if reply:
+                    sock.sendto(reply, addr)
+            except OSError as e:
+                print(f"UDP Error: {e}")
+
+    threading.Thread(target=listen, daemon=True).start()
+    return sock
 
 if __name__ == '__main__':
-    print("Starting Production Lobby Spy Service on port 1945...")
+    print(f"Starting Production Lobby Spy Service on port {HTTP_PORT}...")
+    lobbies.start_sweeper()
+    if "--udp" in sys.argv:
+        print(f"Listening for UDP heartbeats on port {UDP_PORT}...")
+        start_udp_listener()
     # 'threads=4' allows multiple game clients to connect simultaneously
     # without blocking each other.
-    serve(app, host='0.0.0.0', port=1945, threads=4)
\ No newline at end of file
+    serve(app, host='0.0.0.0', port=HTTP_PORT, threads=4)
\ No newline at end of file
@@ -0,0 +1,44 @@
+# text_cache.py
+
+import time
+from collections import OrderedDict
+
+class TextCache:
+    """
+    Rendered text surfaces shared by every screen, keyed by (text, font,
+    color). Screens redraw the same labels every frame, so after the first
+    frame nearly every render is a dictionary lookup. The least recently
+    used surfaces are dropped past max_entries; Config clears the cache
+    whenever the fonts or colors change.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        # Seconds spent in render() since the last take_frame_time()
+        self.frame_time = 0.0
+
+    def render(self, font, text, color):
+        start = time.perf_counter()
+        key = (text, font, tuple(color))
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+        else:
+            self.misses += 1
+            surface = font.render(text, True, color)
+            self.surfaces[key] = surface
+            if len(self.surfaces) > self.max_entries:
+                self.surfaces.popitem(last=False)
+        self.frame_time += time.perf_counter() - start
+        return surface
+
+    def clear(self):
+        self.surfaces.clear()
+
+    def take_frame_time(self):
+        """Returns the time spent rendering text since the last call, and resets it."""
+        elapsed, self.frame_time = self.frame_time, 0.0
+        return elapsed
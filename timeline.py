@@ -0,0 +1,51 @@
+# timeline.py
+
+import time
+from collections import deque
+
+class Timeline:
+    """
+    A queue of timed steps ticked from the main loop, used instead of
+    pygame.time.wait so the window, audio and network keep running while
+    a sting plays out.
+
+        timeline.after(2500, speak_result).after(1000, next_question)
+
+    Each delay counts from when the previous step was due, so a slow frame
+    doesn't push the rest of the sequence back. Steps may queue more steps.
+    """
+    def __init__(self):
+        self.steps = deque()    # [(delay_seconds, action)]
+        self.step_start = 0.0   # when the wait for the front step began
+        self.ticking = False
+
+    @property
+    def busy(self):
+        return bool(self.steps)
+
+    def after(self, delay_ms, action=None):
+        """Runs action delay_ms after the previous step (or now, if idle). Returns self."""
+        # Steps queued by a running step count from when that one was due
+        if not self.steps and not self.ticking:
+            self.step_start = time.monotonic()
+        self.steps.append((delay_ms / 1000, action))
+        return self
+
+    def clear(self):
+        self.steps.clear()
+
+    def update(self, now=None):
+        """Runs every step that has come due. Call once per frame."""
+        if now is None: now = time.monotonic()
+        self.ticking = True
+        try:
+            while self.steps:
+                delay, action = self.steps[0]
+                if now - self.step_start < delay:
+                    break
+                self.steps.popleft()
+                self.step_start += delay
+                if action:
+                    action()
+        finally:
+            self.ticking = False